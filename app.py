@@ -1,14 +1,51 @@
+import time
+_script_start = time.perf_counter()
+
+import json
+import os
+from contextlib import contextmanager
 import streamlit as st
-import pandas as pd
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-import joblib
-from recommendations import SpendingRecommendationSystem
 import warnings
 warnings.filterwarnings('ignore')
 
+from instrumentation import count, span, timed
+
+# Modul berat (numpy, plotly, model) di-import di dalam fungsi yang membutuhkannya,
+# sehingga halaman awal bisa tampil tanpa menunggu semuanya.
+# Jalankan dengan APP_PROFILE_STARTUP=1 untuk melihat waktu import per modul dan waktu render pertama.
+PROFILE_STARTUP = os.environ.get('APP_PROFILE_STARTUP') == '1'
+STARTUP_BUDGET_SECONDS = float(os.environ.get('APP_STARTUP_BUDGET', '1.0'))
+
+@st.cache_resource
+def startup_profile():
+    """Process-wide startup timings, kept across Streamlit reruns"""
+    return {'imports': {}, 'reported': False}
+
+@contextmanager
+def startup_span(name):
+    """Record how long the first execution of a block (usually a lazy import) takes"""
+    if not PROFILE_STARTUP:
+        yield
+        return
+    start = time.perf_counter()
+    yield
+    startup_profile()['imports'].setdefault(name, time.perf_counter() - start)
+
+def report_startup_profile():
+    """Print import times and time to first render once per process"""
+    profile = startup_profile()
+    if not PROFILE_STARTUP or profile['reported']:
+        return
+    profile['reported'] = True
+    first_render = time.perf_counter() - _script_start
+    print("=== STARTUP PROFILE app.py ===")
+    for name, seconds in sorted(profile['imports'].items(), key=lambda item: -item[1]):
+        print(f"  {name:<40} {seconds * 1000:8.1f} ms")
+    status = "OK" if first_render <= STARTUP_BUDGET_SECONDS else "MELEBIHI BUDGET"
+    print(f"  {'time to first render':<40} {first_render * 1000:8.1f} ms "
+          f"(budget {STARTUP_BUDGET_SECONDS * 1000:.0f} ms, {status})")
+    st.sidebar.caption(f"⏱️ Render pertama: {first_render * 1000:.0f} ms ({status})")
+
 # Page config
 st.set_page_config(
     page_title="Analisis Pola Pengeluaran Mahasiswa",
@@ -66,37 +103,58 @@ if 'recommendations' not in st.session_state:
 @st.cache_resource
 def load_models():
     try:
-        kmeans_model = joblib.load('kmeans_model.pkl')
-        scaler = joblib.load('scaler.pkl')
-        cluster_labels = joblib.load('cluster_labels.pkl')
-        rec_system = SpendingRecommendationSystem()
-        return kmeans_model, scaler, cluster_labels, rec_system
+        with startup_span('import inference, lookup_table'):
+            from inference import load_predictor
+            from lookup_table import load_lookup_table
+        with startup_span('import recommendations'):
+            from recommendations import SpendingRecommendationSystem
+        # Artifact kmeans_inference.json tidak butuh scikit-learn; fallback ke file .pkl
+        with startup_span('load model'), span('app.load_models'):
+            predictor = load_predictor()
+            rec_system = SpendingRecommendationSystem()
+            # Tabel lookup opsional (python lookup_table.py --build), None jika belum dibuat
+            lookup_table = load_lookup_table(predictor)
+        return predictor, rec_system, lookup_table
     except FileNotFoundError:
         st.error("Model files tidak ditemukan! Pastikan Anda sudah menjalankan script training terlebih dahulu.")
         st.stop()
 
-# Load sample data for visualization
+# Indeks mahasiswa mirip (dibuat kmeans_analysis.py), dimuat saat pertama dipakai
+@st.cache_resource
+def load_peers():
+    with startup_span('import peer_index'):
+        from peer_index import load_peer_index
+    with startup_span('load peer index'), span('app.load_peer_index'):
+        # None jika belum dibuat atau berasal dari model lama
+        return load_peer_index(load_models()[0])
+
+# Load ringkasan cluster (dibuat kmeans_analysis.py) untuk visualisasi
 @st.cache_data
-def load_sample_data():
+def load_cluster_summary():
     try:
-        return pd.read_csv('student_spending_clustered.csv')
+        with open('cluster_summary.json') as f:
+            return json.load(f)
     except FileNotFoundError:
-        st.error("Data tidak ditemukan! Pastikan Anda sudah menjalankan script generate_data.py")
+        st.error("Ringkasan cluster tidak ditemukan! Pastikan Anda sudah menjalankan script kmeans_analysis.py")
         st.stop()
 
+@timed('app.figure.spending')
 def create_spending_visualization(uang_saku, makanan, transport, hiburan, category):
     """Create spending breakdown visualization"""
+    with startup_span('import plotly.graph_objects'):
+        import plotly.graph_objects as go
     spending_data = {
         'Kategori': ['Makanan', 'Transport', 'Hiburan', 'Sisa'],
         'Jumlah': [makanan, transport, hiburan, max(0, uang_saku - makanan - transport - hiburan)],
         'Warna': ['#ff9999', '#66b3ff', '#99ff99', '#ffcc99']
     }
-    fig_pie = px.pie(
+    # go.Pie dipakai langsung agar plotly.express (dan pandas) tidak perlu di-import
+    fig_pie = go.Figure(data=[go.Pie(
         values=spending_data['Jumlah'],
-        names=spending_data['Kategori'],
-        title="Breakdown Pengeluaran Anda",
-        color_discrete_sequence=spending_data['Warna']
-    )
+        labels=spending_data['Kategori'],
+        marker_colors=spending_data['Warna']
+    )])
+    fig_pie.update_layout(title="Breakdown Pengeluaran Anda")
     fig_pie.update_traces(textposition='inside', textinfo='percent+label')
     fig_bar = go.Figure(data=[
         go.Bar(name='Pengeluaran Anda', x=['Makanan', 'Transport', 'Hiburan'],
@@ -110,11 +168,11 @@ def create_spending_visualization(uang_saku, makanan, transport, hiburan, catego
     )
     return fig_pie, fig_bar
 
-def create_comparison_chart(sample_data, user_category, user_spending):
+@timed('app.figure.comparison')
+def create_comparison_chart(summary, user_category, user_spending):
     """Create comparison with other students"""
-    category_avg = sample_data.groupby('kategori_pengeluaran')[
-        ['pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan']
-    ].mean()
+    with startup_span('import plotly.graph_objects'):
+        import plotly.graph_objects as go
     fig = go.Figure()
     # Add user data
     fig.add_trace(go.Bar(
@@ -125,8 +183,8 @@ def create_comparison_chart(sample_data, user_category, user_spending):
         opacity=0.8
     ))
     # Add category average
-    if user_category in category_avg.index:
-        avg_data = category_avg.loc[user_category]
+    if user_category in summary['categories']:
+        avg_data = summary['categories'][user_category]['means']
         fig.add_trace(go.Bar(
             name=f'Rata-rata {user_category}',
             x=['Makanan', 'Transport', 'Hiburan'],
@@ -142,22 +200,62 @@ def create_comparison_chart(sample_data, user_category, user_spending):
     )
     return fig
 
+@timed('app.figure.peers')
+def create_peer_chart(user_spending, peers):
+    """Compare the user's spending with the average of their nearest peers"""
+    with startup_span('import plotly.graph_objects'):
+        import plotly.graph_objects as go
+    columns = ['pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan']
+    peer_average = [sum(peer[column] for peer in peers) / len(peers) for column in columns]
+    fig = go.Figure(data=[
+        go.Bar(name='Pengeluaran Anda', x=['Makanan', 'Transport', 'Hiburan'],
+               y=[user_spending['makanan'], user_spending['transport'], user_spending['hiburan']],
+               marker_color='red', opacity=0.8),
+        go.Bar(name=f'Rata-rata {len(peers)} mahasiswa termirip', x=['Makanan', 'Transport', 'Hiburan'],
+               y=peer_average, marker_color='purple', opacity=0.6)
+    ])
+    fig.update_layout(
+        title="Perbandingan dengan Mahasiswa yang Paling Mirip",
+        xaxis_title="Kategori Pengeluaran",
+        yaxis_title="Jumlah (Rp)",
+        barmode='group'
+    )
+    return fig
+
+def find_peers(uang_saku, makanan, transport, hiburan, semester):
+    """Nearest students in the clustered dataset, or None without an up-to-date peer index"""
+    index = load_peers()
+    if index is None:
+        return None
+    with span('app.peers'):
+        return index.query(uang_saku, makanan, transport, hiburan, semester)
+
 def predict_spending_category(uang_saku, makanan, transport, hiburan, semester, models):
-    kmeans_model, scaler, cluster_labels, rec_system = models
+    predictor, rec_system, lookup_table = models
     total_pengeluaran = makanan + transport + hiburan
     rasio_pengeluaran = total_pengeluaran / uang_saku if uang_saku > 0 else 0
-    input_data = np.array([[uang_saku, makanan, transport, hiburan, rasio_pengeluaran, semester]])
-    input_scaled = scaler.transform(input_data)
-    cluster = kmeans_model.predict(input_scaled)[0]
-    category = cluster_labels[cluster]
+    with span('app.predict') as predict_span:
+        cluster = None
+        if lookup_table is not None:
+            cluster = lookup_table.lookup(uang_saku, makanan, transport, hiburan, semester)
+        if cluster is None:
+            # Di luar grid: pakai model
+            import numpy as np
+            input_data = np.array([[uang_saku, makanan, transport, hiburan, rasio_pengeluaran, semester]],
+                                  dtype=predictor.dtype)
+            cluster = predictor.predict(input_data)[0]
+            predict_span.set(source='model')
+        else:
+            predict_span.set(source='lut')
+    count('app.predictions')
+    category = predictor.labels[cluster]
     return category, total_pengeluaran, rasio_pengeluaran
 
 # Main app
 def main():
     st.markdown('<h1 class="main-header">💰 Analisis Pola Pengeluaran Mahasiswa</h1>', unsafe_allow_html=True)
     st.markdown("---")
-    models = load_models()
-    sample_data = load_sample_data()
+    summary = load_cluster_summary()
     st.sidebar.header("📊 Input Data Pengeluaran")
     st.sidebar.markdown("Masukkan data pengeluaran bulanan Anda:")
     uang_saku = st.sidebar.number_input(
@@ -203,6 +301,7 @@ def main():
         if total_input > uang_saku * 1.2:
             st.sidebar.error("⚠️ Total pengeluaran terlalu tinggi dibanding uang saku!")
         else:
+            models = load_models()
             category, total_pengeluaran, rasio_pengeluaran = predict_spending_category(
                 uang_saku, pengeluaran_makanan, pengeluaran_transport,
                 pengeluaran_hiburan, semester, models
@@ -212,14 +311,16 @@ def main():
                 'transport': pengeluaran_transport,
                 'hiburan': pengeluaran_hiburan
             }
-            recommendations = models[3].get_recommendations(category, uang_saku, pengeluaran_data)
+            recommendations = models[1].get_recommendations(category, uang_saku, pengeluaran_data)
             st.session_state.recommendations = {
                 'category': category,
                 'recommendations': recommendations,
                 'spending_data': pengeluaran_data,
                 'uang_saku': uang_saku,
                 'total_pengeluaran': total_pengeluaran,
-                'rasio_pengeluaran': rasio_pengeluaran
+                'rasio_pengeluaran': rasio_pengeluaran,
+                'peers': find_peers(uang_saku, pengeluaran_makanan, pengeluaran_transport,
+                                    pengeluaran_hiburan, semester)
             }
     if st.session_state.recommendations:
         result = st.session_state.recommendations
@@ -266,6 +367,31 @@ def main():
             </p>
         </div>
         """, unsafe_allow_html=True)
+        with startup_span('import percentiles'):
+            from percentiles import percentile_ranks
+        # Binary search di tabel kuantil cluster_summary.json; None bila ringkasan belum berisi tabel
+        with span('app.percentiles'):
+            ranks = percentile_ranks(summary, result['category'], {
+                'pengeluaran_makanan': result['spending_data']['makanan'],
+                'pengeluaran_transport': result['spending_data']['transport'],
+                'pengeluaran_hiburan': result['spending_data']['hiburan'],
+                'rasio_pengeluaran': result['rasio_pengeluaran']
+            })
+        if ranks:
+            st.markdown(f"## 📍 Posisi Anda di Kategori {result['category']}")
+            rank_labels = [
+                ('pengeluaran_makanan', "🍽️ Makanan"),
+                ('pengeluaran_transport', "🚌 Transport"),
+                ('pengeluaran_hiburan', "🎮 Hiburan"),
+                ('rasio_pengeluaran', "📊 Rasio Pengeluaran")
+            ]
+            for col, (column, label) in zip(st.columns(4), rank_labels):
+                with col:
+                    st.metric(
+                        label,
+                        f"Persentil {ranks[column]:.0f}",
+                        help=f"Sama dengan atau lebih tinggi dari {ranks[column]:.0f}% mahasiswa kategori {result['category']}"
+                    )
         st.markdown("## 📈 Visualisasi Pengeluaran")
         col1, col2 = st.columns(2)
         with col1:
@@ -280,11 +406,25 @@ def main():
         with col2:
             st.plotly_chart(fig_bar, use_container_width=True)
         fig_comparison = create_comparison_chart(
-            sample_data,
+            summary,
             result['category'],
             result['spending_data']
         )
         st.plotly_chart(fig_comparison, use_container_width=True)
+        if result['peers']:
+            st.markdown("## 👥 Mahasiswa yang Mirip dengan Anda")
+            st.table([
+                {
+                    'Uang Saku': f"Rp {peer['uang_saku']:,}",
+                    'Makanan': f"Rp {peer['pengeluaran_makanan']:,}",
+                    'Transport': f"Rp {peer['pengeluaran_transport']:,}",
+                    'Hiburan': f"Rp {peer['pengeluaran_hiburan']:,}",
+                    'Semester': peer['semester'],
+                    'Kategori': peer['kategori_pengeluaran']
+                }
+                for peer in result['peers']
+            ])
+            st.plotly_chart(create_peer_chart(result['spending_data'], result['peers']), use_container_width=True)
         st.markdown("## 💡 Rekomendasi & Tips")
         st.markdown("### 📝 Tips Pengelolaan Keuangan")
         for tip in result['recommendations']['tips']:
@@ -310,7 +450,8 @@ def main():
                 </div>
                 """, unsafe_allow_html=True)
         st.markdown("### 📊 Rencana Budget Ideal")
-        monthly_plan = models[3].get_monthly_planning(result['category'], result['uang_saku'])
+        rec_system = load_models()[1]
+        monthly_plan = rec_system.get_monthly_planning(result['category'], result['uang_saku'])
         plan_col1, plan_col2 = st.columns(2)
         with plan_col1:
             st.markdown("**Alokasi Budget yang Disarankan:**")
@@ -329,6 +470,8 @@ def main():
                 monthly_plan['hiburan']['amount'] if 'hiburan' in monthly_plan else 0,
                 monthly_plan['tabungan']['amount'] if 'tabungan' in monthly_plan else 0
             ]
+            with startup_span('import plotly.graph_objects'):
+                import plotly.graph_objects as go
             fig_budget = go.Figure(data=[
                 go.Bar(name='Pengeluaran Saat Ini', x=['Makanan', 'Transport', 'Hiburan', 'Tabungan'],
                        y=current_spending, marker_color='lightcoral'),
@@ -361,23 +504,27 @@ def main():
         st.markdown("## 📈 Statistik Data Mahasiswa")
         col1, col2, col3 = st.columns(3)
         with col1:
-            avg_uang_saku = sample_data['uang_saku'].mean()
+            avg_uang_saku = summary['global_means']['uang_saku']
             st.metric("💳 Rata-rata Uang Saku", f"Rp {avg_uang_saku:,.0f}")
         with col2:
-            avg_pengeluaran = sample_data['total_pengeluaran'].mean()
+            avg_pengeluaran = summary['global_means']['total_pengeluaran']
             st.metric("💸 Rata-rata Pengeluaran", f"Rp {avg_pengeluaran:,.0f}")
         with col3:
-            avg_rasio = sample_data['rasio_pengeluaran'].mean()
+            avg_rasio = summary['global_means']['rasio_pengeluaran']
             st.metric("📊 Rata-rata Rasio", f"{avg_rasio:.1%}")
         st.markdown("### 📊 Distribusi Kategori Mahasiswa")
-        category_dist = sample_data['kategori_pengeluaran'].value_counts()
-        fig_dist = px.pie(
-            values=category_dist.values,
-            names=category_dist.index,
-            title="Distribusi Kategori Pengeluaran",
-            color_discrete_map={'Hemat': '#28a745', 'Sedang': '#ffc107', 'Boros': '#dc3545'}
-        )
+        category_dist = {kategori: details['count'] for kategori, details in summary['categories'].items()}
+        category_colors = {'Hemat': '#28a745', 'Sedang': '#ffc107', 'Boros': '#dc3545'}
+        with startup_span('import plotly.graph_objects'):
+            import plotly.graph_objects as go
+        fig_dist = go.Figure(data=[go.Pie(
+            values=list(category_dist.values()),
+            labels=list(category_dist.keys()),
+            marker_colors=[category_colors.get(kategori, '#6c757d') for kategori in category_dist]
+        )])
+        fig_dist.update_layout(title="Distribusi Kategori Pengeluaran")
         st.plotly_chart(fig_dist, use_container_width=True)
+    report_startup_profile()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,253 @@
+"""
+Benchmark suite untuk generate data, training, inferensi, rekomendasi dan chart aplikasi.
+
+Setiap run disimpan ke benchmark_history.json. Dengan --check, hasil dibandingkan
+dengan benchmark_baseline.json dan script keluar dengan kode 1 bila ada case yang
+lebih lambat dari baseline melebihi toleransi.
+
+Pemakaian:
+    python benchmarks.py --sizes 1000,100000 --save-baseline
+    python benchmarks.py --sizes 1000,100000 --check --tolerance 0.2
+    python benchmarks.py --filter recommendations
+"""
+
+import argparse
+import json
+import logging
+import platform
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+
+import numpy as np
+
+HISTORY_PATH = 'benchmark_history.json'
+BASELINE_PATH = 'benchmark_baseline.json'
+DEFAULT_SIZES = (1_000, 100_000)
+DEFAULT_TOLERANCE = 0.2
+
+# Generator loop terlalu lambat untuk ukuran besar
+LOOP_GENERATOR_MAX_ROWS = 10_000
+
+# Nama case yang bisa dibuat setiap group, agar --filter bisa melewati group tanpa membangun setup-nya
+SIZED_CASE_NAMES = ('generate_batch', 'scaler_kmeans_fit', 'predict_batch', 'recommendations_batch',
+                    'monthly_planning_batch', 'peer_index_build', 'peer_index_query', 'generate_loop')
+PER_CALL_CASE_NAMES = ('predict_spending_category[model]', 'get_recommendations', 'get_monthly_planning',
+                       'create_spending_visualization', 'create_comparison_chart', 'percentile_ranks',
+                       'predict_spending_category[lut]')
+
+def measure(func, repeats=5, min_seconds=0.2):
+    """Best seconds per call of ``func`` over ``repeats`` rounds.
+
+    Each round calls ``func`` enough times to last about ``min_seconds``,
+    so fast functions get a stable per-call time. Calls slower than a
+    second are only repeated once.
+    """
+    start = time.perf_counter()
+    func()
+    first = time.perf_counter() - start
+    number = max(1, int(min_seconds / max(first, 1e-9)))
+    if first > 1:
+        repeats = 1
+
+    best = first
+    for _ in range(repeats):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+def _students(n, seed=42):
+    from generate_data import add_derived_columns, generate_student_spending_batch
+    return add_derived_columns(generate_student_spending_batch(n, seed=seed))
+
+def _load_app():
+    """Import app.py outside ``streamlit run`` without its bare-mode warnings"""
+    logging.disable(logging.WARNING)
+    try:
+        import app
+    finally:
+        logging.disable(logging.NOTSET)
+    return app
+
+def sized_cases(n):
+    """Benchmarks whose cost grows with the dataset size ``n``"""
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+
+    from generate_data import generate_student_spending_batch, generate_student_spending_data
+    from inference import features_for_clustering, load_predictor
+    from peer_index import build_peer_index
+    from predict import predict_batch
+    from recommendations import SpendingRecommendationSystem
+
+    df = _students(n)
+    predictor = load_predictor()
+    rec_system = SpendingRecommendationSystem()
+    kategori = predictor.predict_category(df[features_for_clustering].to_numpy())
+
+    def fit():
+        X_scaled = StandardScaler().fit_transform(df[features_for_clustering])
+        KMeans(n_clusters=3, random_state=42, n_init=10).fit(X_scaled)
+
+    peer_frame = df.assign(kategori_pengeluaran=kategori)
+    peer_scaler = StandardScaler().fit(df[features_for_clustering])
+    X_peers = peer_scaler.transform(df[features_for_clustering])
+    peers = build_peer_index(X_peers, peer_frame, peer_scaler, path=None)
+
+    cases = {
+        'generate_batch': lambda: generate_student_spending_batch(n, seed=42),
+        'scaler_kmeans_fit': fit,
+        'predict_batch': lambda: predict_batch(df, predictor),
+        'recommendations_batch': lambda: rec_system.get_recommendations_batch(
+            kategori, df['uang_saku'], df['pengeluaran_makanan'],
+            df['pengeluaran_transport'], df['pengeluaran_hiburan']),
+        'monthly_planning_batch': lambda: rec_system.get_monthly_planning_batch(kategori, df['uang_saku']),
+        'peer_index_build': lambda: build_peer_index(X_peers, peer_frame, peer_scaler, path=None),
+        # Satu query seperti di app.py; harus tetap datar saat n naik
+        'peer_index_query': lambda: peers.query(1000000, 450000, 200000, 150000, 3)
+    }
+    if n <= LOOP_GENERATOR_MAX_ROWS:
+        cases['generate_loop'] = lambda: generate_student_spending_data(n)
+    return cases
+
+def per_call_cases():
+    """Benchmarks of a single call as made by the app, independent of dataset size"""
+    from inference import load_predictor
+    from lookup_table import load_lookup_table
+    from percentiles import percentile_ranks
+    from recommendations import SpendingRecommendationSystem
+
+    app = _load_app()
+    predictor = load_predictor()
+    rec_system = SpendingRecommendationSystem()
+    lookup_table = load_lookup_table(predictor)
+    with open('cluster_summary.json') as f:
+        summary = json.load(f)
+
+    student = (1000000, 450000, 200000, 150000, 3)
+    spending = {'makanan': 450000, 'transport': 200000, 'hiburan': 150000}
+    cases = {
+        'predict_spending_category[model]':
+            lambda: app.predict_spending_category(*student, (predictor, rec_system, None)),
+        'get_recommendations': lambda: rec_system.get_recommendations('Sedang', 1000000, spending),
+        'get_monthly_planning': lambda: rec_system.get_monthly_planning('Sedang', 1000000),
+        'create_spending_visualization': lambda: app.create_spending_visualization(*student[:4], 'Sedang'),
+        'create_comparison_chart': lambda: app.create_comparison_chart(summary, 'Sedang', spending),
+        'percentile_ranks': lambda: percentile_ranks(summary, 'Sedang', {
+            'pengeluaran_makanan': 450000, 'pengeluaran_transport': 200000,
+            'pengeluaran_hiburan': 150000, 'rasio_pengeluaran': 0.8})
+    }
+    if lookup_table is not None:
+        cases['predict_spending_category[lut]'] = \
+            lambda: app.predict_spending_category(*student, (predictor, rec_system, lookup_table))
+    return cases
+
+def run_suite(sizes=DEFAULT_SIZES, name_filter=None):
+    """Run every case and return ``{case name: seconds per call}``"""
+    groups = [(f'[n={n}]', SIZED_CASE_NAMES, lambda n=n: sized_cases(n)) for n in sizes]
+    groups.append(('', PER_CALL_CASE_NAMES, per_call_cases))
+    results = {}
+    for suffix, names, build_cases in groups:
+        if name_filter and not any(name_filter in f'{name}{suffix}' for name in names):
+            # Setup group (mis. dataset n baris) mahal; lewati bila tidak ada case yang lolos filter
+            continue
+        for name, func in build_cases().items():
+            case = f'{name}{suffix}'
+            if name_filter and name_filter not in case:
+                continue
+            results[case] = measure(func)
+            print(f"  {case:<48} {format_seconds(results[case]):>12}")
+    return results
+
+def format_seconds(seconds):
+    if seconds < 1e-3:
+        return f"{seconds * 1e6:.1f} us"
+    if seconds < 1:
+        return f"{seconds * 1e3:.2f} ms"
+    return f"{seconds:.3f} s"
+
+def run_metadata():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'timestamp': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'commit': commit,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.node(),
+        'processor': platform.machine()
+    }
+
+def load_json(path, default):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+def save_json(data, path):
+    with open(path, 'w') as f:
+        json.dump(data, f, indent=2)
+
+def compare_with_baseline(results, baseline, tolerance):
+    """Print current vs baseline per case and return the names of regressed cases"""
+    regressions = []
+    print(f"\n{'Case':<48} {'baseline':>12} {'sekarang':>12} {'rasio':>7}")
+    for case, seconds in results.items():
+        if case not in baseline['results']:
+            print(f"{case:<48} {'-':>12} {format_seconds(seconds):>12} {'baru':>7}")
+            continue
+        ratio = seconds / baseline['results'][case]
+        flag = ''
+        if ratio > 1 + tolerance:
+            regressions.append(case)
+            flag = '  REGRESI'
+        print(f"{case:<48} {format_seconds(baseline['results'][case]):>12} "
+              f"{format_seconds(seconds):>12} {ratio:>6.2f}x{flag}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark suite analisis pengeluaran mahasiswa")
+    parser.add_argument('--sizes', default=','.join(str(n) for n in DEFAULT_SIZES),
+                        help="Ukuran dataset, dipisah koma")
+    parser.add_argument('--filter', help="Hanya jalankan case yang namanya mengandung teks ini")
+    parser.add_argument('--check', action='store_true',
+                        help=f"Bandingkan dengan {BASELINE_PATH}, keluar dengan kode 1 bila ada regresi")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help="Perlambatan relatif yang masih diterima (0.2 = 20%%)")
+    parser.add_argument('--save-baseline', action='store_true', help=f"Simpan hasil run ini ke {BASELINE_PATH}")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    print(f"=== BENCHMARK (ukuran: {', '.join(f'{n:,}' for n in sizes)}) ===")
+    results = run_suite(sizes, args.filter)
+
+    run = {**run_metadata(), 'sizes': sizes, 'results': results}
+    history = load_json(HISTORY_PATH, [])
+    history.append(run)
+    save_json(history, HISTORY_PATH)
+    print(f"\nHasil ditambahkan ke {HISTORY_PATH} ({len(history)} run)")
+
+    if args.save_baseline:
+        save_json(run, BASELINE_PATH)
+        print(f"Baseline disimpan ke {BASELINE_PATH}")
+
+    if args.check:
+        baseline = load_json(BASELINE_PATH, None)
+        if baseline is None:
+            print(f"❌ {BASELINE_PATH} tidak ditemukan, jalankan dulu dengan --save-baseline")
+            sys.exit(1)
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} case lebih lambat dari baseline lebih dari {args.tolerance:.0%}")
+            sys.exit(1)
+        print(f"\n✅ Tidak ada regresi di atas {args.tolerance:.0%}")
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import argparse
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
@@ -10,65 +12,147 @@ from sklearn.metrics import classification_report, accuracy_score
 import warnings
 warnings.filterwarnings('ignore')
 
-# Load data
-df = pd.read_csv('student_spending_data.csv')
-
-print("=== EKSPLORASI DATA ===")
-print(f"Shape data: {df.shape}")
-print(f"Missing values: {df.isnull().sum().sum()}")
-print("\nInfo dataset:")
-print(df.info())
-
-# Visualisasi distribusi data
-plt.figure(figsize=(15, 10))
-
-plt.subplot(2, 3, 1)
-plt.hist(df['uang_saku'], bins=30, alpha=0.7, color='skyblue')
-plt.title('Distribusi Uang Saku')
-plt.xlabel('Uang Saku (Rp)')
-
-plt.subplot(2, 3, 2)
-plt.hist(df['total_pengeluaran'], bins=30, alpha=0.7, color='lightgreen')
-plt.title('Distribusi Total Pengeluaran')
-plt.xlabel('Total Pengeluaran (Rp)')
-
-plt.subplot(2, 3, 3)
-plt.hist(df['rasio_pengeluaran'], bins=30, alpha=0.7, color='salmon')
-plt.title('Distribusi Rasio Pengeluaran')
-plt.xlabel('Rasio Pengeluaran')
-
-plt.subplot(2, 3, 4)
-plt.scatter(df['uang_saku'], df['total_pengeluaran'], alpha=0.6)
-plt.title('Uang Saku vs Total Pengeluaran')
-plt.xlabel('Uang Saku (Rp)')
-plt.ylabel('Total Pengeluaran (Rp)')
-
-plt.subplot(2, 3, 5)
-semester_spending = df.groupby('semester')['rasio_pengeluaran'].mean()
-plt.bar(semester_spending.index, semester_spending.values, color='orange', alpha=0.7)
-plt.title('Rata-rata Rasio Pengeluaran per Semester')
-plt.xlabel('Semester')
-plt.ylabel('Rasio Pengeluaran')
-
-plt.subplot(2, 3, 6)
-spending_breakdown = df[['pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan']].mean()
-plt.pie(spending_breakdown.values, labels=spending_breakdown.index, autopct='%1.1f%%')
-plt.title('Rata-rata Breakdown Pengeluaran')
-
-plt.tight_layout()
-plt.savefig('data_exploration.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-print("\n=== PREPROCESSING DATA ===")
-
-# Fitur untuk clustering
-features_for_clustering = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport', 
-                          'pengeluaran_hiburan', 'rasio_pengeluaran', 'semester']
-
-# Normalisasi data untuk clustering
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(df[features_for_clustering])
-
-print("Data preprocessing selesai!")
-print(f"Features untuk clustering: {features_for_clustering}")
-print(f"Shape data setelah scaling: {X_scaled.shape}")
\ No newline at end of file
+from fast_plots import BackgroundRenderer, binned_counts, binned_hist, draw_density, use_headless_backend
+from feature_store import ensure_feature_store
+from instrumentation import span
+from storage import DATA_PATH, read_dataset
+
+spending_columns = ['pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan']
+
+def plot_exploration(df, dpi=300):
+    """Original figure: raw histograms and a per-point scatter"""
+    # Visualisasi distribusi data
+    plt.figure(figsize=(15, 10))
+
+    plt.subplot(2, 3, 1)
+    plt.hist(df['uang_saku'], bins=30, alpha=0.7, color='skyblue')
+    plt.title('Distribusi Uang Saku')
+    plt.xlabel('Uang Saku (Rp)')
+
+    plt.subplot(2, 3, 2)
+    plt.hist(df['total_pengeluaran'], bins=30, alpha=0.7, color='lightgreen')
+    plt.title('Distribusi Total Pengeluaran')
+    plt.xlabel('Total Pengeluaran (Rp)')
+
+    plt.subplot(2, 3, 3)
+    plt.hist(df['rasio_pengeluaran'], bins=30, alpha=0.7, color='salmon')
+    plt.title('Distribusi Rasio Pengeluaran')
+    plt.xlabel('Rasio Pengeluaran')
+
+    plt.subplot(2, 3, 4)
+    plt.scatter(df['uang_saku'], df['total_pengeluaran'], alpha=0.6)
+    plt.title('Uang Saku vs Total Pengeluaran')
+    plt.xlabel('Uang Saku (Rp)')
+    plt.ylabel('Total Pengeluaran (Rp)')
+
+    plt.subplot(2, 3, 5)
+    semester_spending = df.groupby('semester')['rasio_pengeluaran'].mean()
+    plt.bar(semester_spending.index, semester_spending.values, color='orange', alpha=0.7)
+    plt.title('Rata-rata Rasio Pengeluaran per Semester')
+    plt.xlabel('Semester')
+    plt.ylabel('Rasio Pengeluaran')
+
+    plt.subplot(2, 3, 6)
+    spending_breakdown = df[spending_columns].mean()
+    plt.pie(spending_breakdown.values, labels=spending_breakdown.index, autopct='%1.1f%%')
+    plt.title('Rata-rata Breakdown Pengeluaran')
+
+    plt.tight_layout()
+    plt.savefig('data_exploration.png', dpi=dpi, bbox_inches='tight')
+    plt.show()
+
+def exploration_bins(df, bins=200):
+    """Reduce the dataset to the small arrays the fast figure needs"""
+    semester_spending = df.groupby('semester')['rasio_pengeluaran'].mean()
+    return {
+        'hist': {column: binned_hist(df[column]) for column in ['uang_saku', 'total_pengeluaran', 'rasio_pengeluaran']},
+        'density': binned_counts(df['uang_saku'], df['total_pengeluaran'], bins),
+        'semester_spending': (semester_spending.index.to_numpy(), semester_spending.to_numpy()),
+        'spending_breakdown': df[spending_columns].mean()
+    }
+
+def render_exploration_fast(data, path='data_exploration.png', dpi=150):
+    """Same layout as plot_exploration, drawn from pre-binned data"""
+    fig, axes = plt.subplots(2, 3, figsize=(15, 10))
+    hist_styles = [
+        ('uang_saku', 'skyblue', 'Distribusi Uang Saku', 'Uang Saku (Rp)'),
+        ('total_pengeluaran', 'lightgreen', 'Distribusi Total Pengeluaran', 'Total Pengeluaran (Rp)'),
+        ('rasio_pengeluaran', 'salmon', 'Distribusi Rasio Pengeluaran', 'Rasio Pengeluaran')
+    ]
+    for ax, (column, color, title, xlabel) in zip(axes[0], hist_styles):
+        counts, edges = data['hist'][column]
+        ax.stairs(counts, edges, fill=True, alpha=0.7, color=color)
+        ax.set_title(title)
+        ax.set_xlabel(xlabel)
+
+    counts, x_edges, y_edges = data['density']
+    draw_density(axes[1, 0], counts, x_edges, y_edges, ['tab:blue'])
+    axes[1, 0].set_title('Uang Saku vs Total Pengeluaran (densitas)')
+    axes[1, 0].set_xlabel('Uang Saku (Rp)')
+    axes[1, 0].set_ylabel('Total Pengeluaran (Rp)')
+
+    semesters, ratios = data['semester_spending']
+    axes[1, 1].bar(semesters, ratios, color='orange', alpha=0.7)
+    axes[1, 1].set_title('Rata-rata Rasio Pengeluaran per Semester')
+    axes[1, 1].set_xlabel('Semester')
+    axes[1, 1].set_ylabel('Rasio Pengeluaran')
+
+    breakdown = data['spending_breakdown']
+    axes[1, 2].pie(breakdown.values, labels=breakdown.index, autopct='%1.1f%%')
+    axes[1, 2].set_title('Rata-rata Breakdown Pengeluaran')
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+def main():
+    parser = argparse.ArgumentParser(description="Eksplorasi dan visualisasi dataset pengeluaran mahasiswa")
+    parser.add_argument('--input', default=DATA_PATH, help="Tabel .npz atau file CSV")
+    parser.add_argument('--fast', action='store_true',
+                        help="Mode headless: scatter di-bin menjadi gambar densitas, tanpa plt.show()")
+    parser.add_argument('--dpi', type=int, default=300, help="Resolusi PNG")
+    parser.add_argument('--plot-workers', type=int, default=2, help="Jumlah proses render untuk mode --fast")
+    args = parser.parse_args()
+
+    if args.fast:
+        use_headless_backend()
+
+    # Load data
+    with span('explore.load'):
+        df = read_dataset(args.input)
+
+    print("=== EKSPLORASI DATA ===")
+    print(f"Shape data: {df.shape}")
+    print(f"Missing values: {df.isnull().sum().sum()}")
+    print("\nInfo dataset:")
+    print(df.info())
+
+    renderer = None
+    with span('explore.plot', fast=args.fast):
+        if args.fast:
+            # Figure dirender di proses lain selama preprocessing berjalan
+            renderer = BackgroundRenderer(args.plot_workers)
+            renderer.submit(render_exploration_fast, exploration_bins(df), 'data_exploration.png', args.dpi)
+        else:
+            plot_exploration(df, args.dpi)
+
+    print("\n=== PREPROCESSING DATA ===")
+
+    # Fitur untuk clustering
+    features_for_clustering = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport',
+                              'pengeluaran_hiburan', 'rasio_pengeluaran', 'semester']
+
+    # Normalisasi data untuk clustering: disimpan di feature store dan dipakai ulang oleh kmeans_analysis.py
+    with span('explore.scale'):
+        X_scaled = ensure_feature_store(args.input).X
+
+    print("Data preprocessing selesai!")
+    print(f"Features untuk clustering: {features_for_clustering}")
+    print(f"Shape data setelah scaling: {X_scaled.shape}")
+
+    if renderer:
+        with span('explore.plot_wait'):
+            renderer.wait()
+
+if __name__ == "__main__":
+    main()
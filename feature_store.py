@@ -0,0 +1,201 @@
+"""
+Feature store: matriks fitur clustering yang sudah di-scale, dihitung sekali per dataset.
+
+Enam kolom features_for_clustering dibaca dan di-scale dengan StandardScaler satu
+kali, lalu disimpan sebagai features.npy (float64 atau float32, dibuka memory-mapped) beserta
+statistik scaler di meta.json. explore_data.py, kmeans_analysis.py dan worker
+proses sweep K memakai file yang sama tanpa parsing dan scaling ulang; worker
+cukup menerima path file dan membukanya sendiri (zero-copy).
+
+Store ditandai dengan hash isi dataset sumber; bila dataset berubah, store
+dibangun ulang. Pembangunan berjalan per chunk (statistik dari streaming_stats.py,
+lalu satu pass transform ke file), jadi dataset dan shard manifest.json yang lebih
+besar dari RAM juga bisa dipakai.
+
+Pemakaian:
+    python feature_store.py                       # bangun dari dataset default
+    python feature_store.py --input big.csv --verify
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from inference import features_for_clustering
+from instrumentation import span
+from storage import DATA_PATH, iter_dataset_chunks, read_dataset
+from streaming_stats import compute_stats
+
+FEATURE_STORE_DIR = 'feature_store'
+
+def source_hash(path, chunk_size=1 << 20):
+    """SHA-256 of the dataset file the store was built from.
+
+    For a shard manifest.json the shard files it lists are hashed too, so
+    shards regenerated with the same layout (same manifest) are detected.
+    """
+    paths = [path]
+    if path.endswith('manifest.json'):
+        from generate_data import shard_paths
+        paths += shard_paths(path)
+    digest = hashlib.sha256()
+    for file_path in paths:
+        with open(file_path, 'rb') as f:
+            for block in iter(lambda: f.read(chunk_size), b''):
+                digest.update(block)
+    return digest.hexdigest()
+
+def _replace_atomically(write, path):
+    # Tulis ke file sementara lalu ganti, agar pembaca tidak pernah melihat file setengah jadi
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+def build_feature_store(data_path=DATA_PATH, output_dir=FEATURE_STORE_DIR, chunk_size=1_000_000, workers=1,
+                        dtype=np.float64):
+    """Fit the scaler on ``data_path`` and write the scaled matrix plus its statistics.
+
+    Both passes stream ``chunk_size`` rows at a time; shards of a
+    manifest.json are summarised in ``workers`` processes. Statistics are
+    always accumulated in float64; only the stored matrix uses ``dtype``.
+    """
+    with span('feature_store.build'):
+        os.makedirs(output_dir, exist_ok=True)
+        stats = compute_stats(data_path, features_for_clustering, chunk_size, workers)
+        scaler = stats.to_scaler(features_for_clustering)
+
+        def write_matrix(path):
+            X = np.lib.format.open_memmap(path, mode='w+', dtype=dtype,
+                                          shape=(stats.n, len(features_for_clustering)))
+            start = 0
+            for chunk in iter_dataset_chunks(data_path, chunk_size, features_for_clustering, typed=True):
+                X[start:start + len(chunk)] = scaler.transform(chunk[features_for_clustering])
+                start += len(chunk)
+            X.flush()
+
+        def write_meta(path):
+            with open(path, 'w') as f:
+                json.dump(meta, f, indent=2)
+
+        meta = {
+            'source': data_path,
+            'source_sha256': source_hash(data_path),
+            'features': features_for_clustering,
+            'dtype': np.dtype(dtype).name,
+            'n_samples': stats.n,
+            'mean': scaler.mean_.tolist(),
+            'var': scaler.var_.tolist(),
+            'scale': scaler.scale_.tolist()
+        }
+        _replace_atomically(write_matrix, os.path.join(output_dir, 'features.npy'))
+        _replace_atomically(write_meta, os.path.join(output_dir, 'meta.json'))
+    return FeatureStore(output_dir)
+
+class FeatureStore:
+    """Memory-mapped scaled feature matrix with the statistics of its scaler"""
+
+    def __init__(self, store_dir=FEATURE_STORE_DIR):
+        with span('feature_store.attach'):
+            with open(os.path.join(store_dir, 'meta.json')) as f:
+                self.meta = json.load(f)
+            self.X = np.load(os.path.join(store_dir, 'features.npy'), mmap_mode='r')
+        self.store_dir = store_dir
+
+    def scaler(self):
+        """A fitted StandardScaler equal to the one the matrix was scaled with"""
+        from sklearn.preprocessing import StandardScaler
+
+        scaler = StandardScaler()
+        scaler.mean_ = np.array(self.meta['mean'])
+        scaler.var_ = np.array(self.meta['var'])
+        scaler.scale_ = np.array(self.meta['scale'])
+        scaler.n_samples_seen_ = np.int64(self.meta['n_samples'])
+        scaler.n_features_in_ = len(self.meta['features'])
+        scaler.feature_names_in_ = np.array(self.meta['features'], dtype=object)
+        return scaler
+
+    def size_report(self):
+        files = ['features.npy', 'meta.json']
+        return {
+            'rows': self.X.shape[0],
+            'features': self.X.shape[1],
+            'dtype': self.X.dtype.name,
+            'bytes': sum(os.path.getsize(os.path.join(self.store_dir, f)) for f in files)
+        }
+
+def load_feature_store(data_path=DATA_PATH, store_dir=FEATURE_STORE_DIR, dtype=np.float64):
+    """Attach to the store if it was built from the current ``data_path`` in ``dtype``, otherwise return None"""
+    if not os.path.exists(os.path.join(store_dir, 'meta.json')):
+        return None
+    store = FeatureStore(store_dir)
+    if store.meta.get('source_sha256') != source_hash(data_path) or store.X.dtype != dtype:
+        # Store dari dataset lama atau dtype lain, jangan dipakai
+        return None
+    return store
+
+def ensure_feature_store(data_path=DATA_PATH, store_dir=FEATURE_STORE_DIR, dtype=np.float64):
+    """Attach to an up-to-date store for ``data_path``, building it first if needed"""
+    return (load_feature_store(data_path, store_dir, dtype)
+            or build_feature_store(data_path, store_dir, dtype=dtype))
+
+def shareable(X):
+    """What to send to a worker process: the .npy path of a memory-mapped matrix, else the array itself"""
+    if isinstance(X, np.memmap) and X.filename:
+        return X.filename
+    return X
+
+def attach(X):
+    """Inverse of shareable(), called inside the worker"""
+    if isinstance(X, str):
+        return np.load(X, mmap_mode='r')
+    return X
+
+def verify_feature_store(store, data_path):
+    """Compare the store with a fresh parse + StandardScaler fit; returns max abs difference and timings"""
+    from sklearn.preprocessing import StandardScaler
+
+    start = time.perf_counter()
+    X_fresh = StandardScaler().fit_transform(read_dataset(data_path)[features_for_clustering])
+    fresh_seconds = time.perf_counter() - start
+
+    # Waktu attach termasuk satu pass membaca seluruh matriks, bukan hanya membuka mmap
+    start = time.perf_counter()
+    attached = FeatureStore(store.store_dir)
+    attached.X.sum()
+    attach_seconds = time.perf_counter() - start
+    return {
+        'max_abs_diff': float(np.abs(attached.X - X_fresh).max()),
+        'fresh_seconds': fresh_seconds,
+        'attach_seconds': attach_seconds
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Bangun matriks fitur ter-scale bersama untuk stage pipeline")
+    parser.add_argument('--input', default=DATA_PATH, help="Tabel .npz atau file CSV")
+    parser.add_argument('--output-dir', default=FEATURE_STORE_DIR, help="Direktori feature store")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="Jumlah baris per chunk")
+    parser.add_argument('--workers', type=int, default=1, help="Jumlah proses untuk shard manifest.json")
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64', help="Tipe matriks yang disimpan")
+    parser.add_argument('--verify', action='store_true',
+                        help="Bandingkan dengan parsing + scaling ulang dan ukur waktunya")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    store = build_feature_store(args.input, args.output_dir, args.chunk_size, args.workers, args.dtype)
+    report = store.size_report()
+    print(f"Feature store dibangun dalam {time.perf_counter() - start:.2f} s")
+    print(f"Matriks: {report['rows']:,} x {report['features']} {report['dtype']} "
+          f"({report['bytes'] / 1e6:,.1f} MB di {args.output_dir}/)")
+
+    if args.verify:
+        result = verify_feature_store(store, args.input)
+        print(f"Selisih maksimum dengan fit ulang: {result['max_abs_diff']:.3g}")
+        print(f"Parsing + scaling ulang : {result['fresh_seconds'] * 1e3:,.1f} ms")
+        print(f"Attach + baca matriks   : {result['attach_seconds'] * 1e3:,.1f} ms")
+
+if __name__ == "__main__":
+    main()
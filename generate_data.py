@@ -1,11 +1,34 @@
+import argparse
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 import random
 
+from instrumentation import count, span
+from storage import DATA_PATH, load_table, save_table
+
 # Set random seed untuk konsistensi
 np.random.seed(42)
 random.seed(42)
 
+# Parameter distribusi uang saku per kelompok semester: (semester maksimum, mean, std)
+UANG_SAKU_DISTRIBUTION = [
+    (2, 800000, 200000),   # Semester awal
+    (4, 900000, 250000),   # Semester tengah
+    (8, 1000000, 300000),  # Semester akhir
+]
+UANG_SAKU_MIN = 400000
+UANG_SAKU_MAX = 2000000
+
+DATASET_COLUMNS = [
+    'uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan',
+    'semester', 'total_pengeluaran', 'rasio_pengeluaran', 'sisa_uang'
+]
+
 def generate_student_spending_data(n_samples=500):
     """Generate realistic student spending data"""
     
@@ -58,20 +81,252 @@ def generate_student_spending_data(n_samples=500):
     
     return pd.DataFrame(data)
 
-# Generate data
-df = generate_student_spending_data(500)
+def generate_student_spending_batch(n_samples=500, seed=42):
+    """Generate student spending data with whole-column NumPy draws.
+
+    Produces the same distribution as ``generate_student_spending_data`` but
+    draws every column as an array instead of looping per student.
+
+    Seed contract:
+    - ``seed`` may be an int, ``None`` or a ``np.random.Generator``. An int
+      (or ``None``) is passed to ``np.random.default_rng``; a Generator is
+      used as-is and advanced.
+    - The same ``(seed, n_samples)`` always gives an identical DataFrame, on
+      any platform with the same NumPy major version.
+    - Global state (``np.random.seed`` / ``random.seed``) is neither read nor
+      modified, and the rows differ from the loop generator for the same seed.
+    - Columns are drawn in a fixed order (semester, uang saku, then ratio and
+      jitter for makanan, transport, hiburan), so one call of ``n`` rows is
+      not the concatenation of two calls of ``n/2`` rows.
+    """
+    rng = seed if isinstance(seed, np.random.Generator) else np.random.default_rng(seed)
+
+    semester = rng.integers(1, 9, size=n_samples)
+
+    # Uang saku berdasarkan semester (mahasiswa senior biasanya lebih mandiri)
+    mean = np.empty(n_samples)
+    std = np.empty(n_samples)
+    lower = 0
+    for max_semester, group_mean, group_std in UANG_SAKU_DISTRIBUTION:
+        mask = (semester > lower) & (semester <= max_semester)
+        mean[mask] = group_mean
+        std[mask] = group_std
+        lower = max_semester
+    uang_saku = rng.normal(mean, std)
+    np.clip(uang_saku, UANG_SAKU_MIN, UANG_SAKU_MAX, out=uang_saku)  # Batasi range
+    del mean, std
+
+    # Pengeluaran makanan (30-50%), transport (10-25%), hiburan (5-30%) dari uang saku
+    pengeluaran_makanan = uang_saku * rng.uniform(0.3, 0.5, n_samples)
+    pengeluaran_makanan *= rng.uniform(0.8, 1.2, n_samples)
+    pengeluaran_transport = uang_saku * rng.uniform(0.1, 0.25, n_samples)
+    pengeluaran_transport *= rng.uniform(0.7, 1.3, n_samples)
+    pengeluaran_hiburan = uang_saku * rng.uniform(0.05, 0.3, n_samples)
+    pengeluaran_hiburan *= rng.uniform(0.5, 1.5, n_samples)
+
+    # Jika total melebihi uang saku (toleransi 10%), sesuaikan ke 95% uang saku
+    total_pengeluaran = pengeluaran_makanan + pengeluaran_transport + pengeluaran_hiburan
+    over_budget = total_pengeluaran > uang_saku * 1.1
+    factor = uang_saku[over_budget] * 0.95 / total_pengeluaran[over_budget]
+    pengeluaran_makanan[over_budget] *= factor
+    pengeluaran_transport[over_budget] *= factor
+    pengeluaran_hiburan[over_budget] *= factor
+    del total_pengeluaran, over_budget, factor
+
+    # Bulatkan ke ribuan terdekat
+    return pd.DataFrame({
+        'uang_saku': np.round(uang_saku, -3),
+        'pengeluaran_makanan': np.round(pengeluaran_makanan, -3),
+        'pengeluaran_transport': np.round(pengeluaran_transport, -3),
+        'pengeluaran_hiburan': np.round(pengeluaran_hiburan, -3),
+        'semester': semester
+    })
+
+def add_derived_columns(df):
+    """Add total, ratio and remaining-money columns in place"""
+    df['total_pengeluaran'] = df['pengeluaran_makanan'] + df['pengeluaran_transport'] + df['pengeluaran_hiburan']
+    df['rasio_pengeluaran'] = df['total_pengeluaran'] / df['uang_saku']
+    df['sisa_uang'] = df['uang_saku'] - df['total_pengeluaran']
+    return df
+
+def shard_seeds(seed, n_shards):
+    """Derive one independent, reproducible child seed per shard from a master seed.
+
+    Child ``i`` is ``SeedSequence(seed).spawn(...)[i]``, which depends only on
+    ``(seed, i)`` - not on the number of shards or on which worker runs it.
+    """
+    return np.random.SeedSequence(seed).spawn(n_shards)
+
+def write_shard(df, output_dir, index, formats=('csv', 'npz')):
+    """Write one chunk as numbered shard files and return its manifest entry"""
+    files = {}
+    for fmt in formats:
+        filename = f"shard-{index:05d}.{fmt}"
+        path = os.path.join(output_dir, filename)
+        if fmt == 'csv':
+            df.to_csv(path, index=False)
+        elif fmt == 'npz':
+            # Format kolumnar bertipe dari storage.py
+            save_table(df, path)
+        else:
+            raise ValueError(f"Format shard tidak dikenal: {fmt}")
+        files[fmt] = filename
+    return {'index': index, 'rows': len(df), 'files': files}
+
+def generate_shard(task):
+    """Generate and write a single shard; runs inside a pool worker"""
+    index, n_rows, shard_seed, output_dir, formats = task
+    with span('generate.shard', index=index, rows=n_rows):
+        df = generate_student_spending_batch(n_rows, seed=np.random.default_rng(shard_seed))
+        add_derived_columns(df)
+        entry = write_shard(df, output_dir, index, formats)
+    count('generate.rows', n_rows)
+    return entry
+
+def write_sharded_dataset(n_samples, output_dir, chunk_size=1_000_000, seed=42,
+                          formats=('csv', 'npz'), workers=1):
+    """Stream the dataset to numbered shards plus manifest.json with bounded memory.
+
+    With ``workers > 1`` shards are generated in a process pool. Each shard
+    only depends on its own child seed, so the files are byte-identical for
+    any worker count.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    n_shards = -(-n_samples // chunk_size)
+    tasks = [
+        (index, min(chunk_size, n_samples - index * chunk_size), shard_seed, output_dir, tuple(formats))
+        for index, shard_seed in enumerate(shard_seeds(seed, n_shards))
+    ]
+
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        results = executor.map(generate_shard, tasks) if executor else map(generate_shard, tasks)
+        shards = []
+        for entry in results:
+            shards.append(entry)
+            print(f"  shard {entry['index']:05d}: {entry['rows']:,} baris")
+    finally:
+        if executor:
+            executor.shutdown()
+
+    manifest = {
+        'n_samples': n_samples,
+        'chunk_size': chunk_size,
+        'seed': seed,
+        'formats': list(formats),
+        'columns': DATASET_COLUMNS,
+        'shards': shards
+    }
+    with open(os.path.join(output_dir, 'manifest.json'), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def shard_paths(manifest_path, fmt=None):
+    """Paths of the shard files listed in a manifest (NPZ preferred when available)"""
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    base_dir = os.path.dirname(manifest_path)
+    if fmt is None:
+        fmt = 'npz' if 'npz' in manifest['formats'] else manifest['formats'][0]
+    return [os.path.join(base_dir, shard['files'][fmt]) for shard in manifest['shards']]
+
+def read_shard(path, columns=None):
+    """Read one shard file as a DataFrame"""
+    if path.endswith('.npz'):
+        return load_table(path, columns)
+    return pd.read_csv(path, usecols=columns)
+
+def iter_shard_frames(manifest_path, fmt=None, columns=None):
+    """Yield each shard listed in a manifest as a DataFrame (NPZ preferred when available)"""
+    for path in shard_paths(manifest_path, fmt):
+        yield read_shard(path, columns)
+
+def run_benchmark(sizes=(10_000, 1_000_000, 10_000_000), loop_size=10_000):
+    """Time the batch generator against the loop generator"""
+    print("=== BENCHMARK GENERATE DATA ===")
+
+    start = time.perf_counter()
+    df_loop = generate_student_spending_data(loop_size)
+    loop_seconds = time.perf_counter() - start
+    print(f"loop  n={loop_size:>11,}: {loop_seconds:8.3f} s  ({loop_size / loop_seconds:,.0f} baris/s)")
+
+    for n in sizes:
+        start = time.perf_counter()
+        df_batch = generate_student_spending_batch(n, seed=42)
+        seconds = time.perf_counter() - start
+        speedup = (n / seconds) / (loop_size / loop_seconds)
+        print(f"batch n={n:>11,}: {seconds:8.3f} s  ({n / seconds:,.0f} baris/s, {speedup:,.0f}x loop)")
+
+    # Bandingkan bentuk distribusi kedua generator
+    print("\nPerbandingan distribusi (loop vs batch):")
+    columns = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan', 'semester']
+    comparison = pd.DataFrame({
+        'loop_mean': df_loop[columns].mean(),
+        'batch_mean': df_batch[columns].mean(),
+        'loop_std': df_loop[columns].std(),
+        'batch_std': df_batch[columns].std(),
+    })
+    print(comparison.round(1))
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate dataset simulasi pengeluaran mahasiswa")
+    parser.add_argument('--n-samples', type=int, default=500, help="Jumlah mahasiswa")
+    parser.add_argument('--mode', choices=['loop', 'batch'],
+                        help="loop = generator asli per baris (default), batch = generator NumPy vektor; "
+                             "--stream selalu memakai batch")
+    parser.add_argument('--seed', type=int, default=42, help="Seed untuk mode batch")
+    parser.add_argument('--output', default=DATA_PATH, help="File tabel output (.npz)")
+    parser.add_argument('--csv-output', default='student_spending_data.csv',
+                        help="File CSV ekspor (string kosong untuk tidak menulis CSV)")
+    parser.add_argument('--stream', action='store_true',
+                        help="Tulis dataset secara streaming ke shard bernomor dengan generator batch (memori konstan)")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="Jumlah baris per shard")
+    parser.add_argument('--output-dir', default='data/shards', help="Folder shard untuk mode --stream")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Jumlah proses untuk mode --stream (hasil identik untuk berapa pun worker)")
+    parser.add_argument('--formats', default='csv,npz', help="Format shard, dipisah koma (csv, npz)")
+    parser.add_argument('--benchmark', action='store_true', help="Jalankan benchmark 1e4, 1e6 dan 1e7 baris")
+    args = parser.parse_args()
+    if args.stream and args.mode == 'loop':
+        parser.error("--stream selalu memakai generator batch; --mode loop tidak didukung")
+    mode = args.mode or 'loop'
+
+    if args.benchmark:
+        run_benchmark()
+        return
+
+    if args.stream:
+        print(f"Menulis {args.n_samples:,} baris ke {args.output_dir} ({args.workers} worker) ...")
+        start = time.perf_counter()
+        manifest = write_sharded_dataset(args.n_samples, args.output_dir, args.chunk_size,
+                                         args.seed, tuple(args.formats.split(',')), args.workers)
+        seconds = time.perf_counter() - start
+        print(f"Dataset berhasil dibuat: {len(manifest['shards'])} shard "
+              f"dalam {seconds:.2f} s ({args.n_samples / seconds:,.0f} baris/s)")
+        return
+
+    # Generate data
+    with span('generate.data', mode=mode, rows=args.n_samples):
+        if mode == 'batch':
+            df = generate_student_spending_batch(args.n_samples, seed=args.seed)
+        else:
+            df = generate_student_spending_data(args.n_samples)
+
+        # Tambahkan beberapa kolom turunan untuk analisis
+        add_derived_columns(df)
+    count('generate.rows', len(df))
 
-# Tambahkan beberapa kolom turunan untuk analisis
-df['total_pengeluaran'] = df['pengeluaran_makanan'] + df['pengeluaran_transport'] + df['pengeluaran_hiburan']
-df['rasio_pengeluaran'] = df['total_pengeluaran'] / df['uang_saku']
-df['sisa_uang'] = df['uang_saku'] - df['total_pengeluaran']
+    # Simpan dataset (tabel bertipe + ekspor CSV)
+    with span('generate.save'):
+        save_table(df, args.output, args.csv_output)
 
-# Simpan dataset
-df.to_csv('student_spending_data.csv', index=False)
+    print("Dataset berhasil dibuat!")
+    print(f"Total data: {len(df)} mahasiswa")
+    print("\nContoh data:")
+    print(df.head())
+    print("\nStatistik dasar:")
+    print(df.describe())
 
-print("Dataset berhasil dibuat!")
-print(f"Total data: {len(df)} mahasiswa")
-print("\nContoh data:")
-print(df.head())
-print("\nStatistik dasar:")
-print(df.describe())
\ No newline at end of file
+if __name__ == "__main__":
+    main()
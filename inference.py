@@ -0,0 +1,171 @@
+"""
+Predictor K-Means tanpa scikit-learn.
+
+Saat training, scaler dilipat ke dalam centroid: centroid disimpan dalam satuan
+Rupiah mentah (mean + scale * centroid) bersama bobot 1/scale per fitur, sehingga
+prediksi tidak perlu langkah scaling terpisah. Artifact disimpan sebagai JSON biasa,
+termasuk dtype perhitungan jarak (float64, atau float32 untuk model yang dilatih
+dengan kmeans_analysis.py --dtype float32).
+
+Pemakaian:
+    python inference.py --export   # buat kmeans_inference.json dari file .pkl
+    python inference.py --verify   # cek kesamaan hasil dan ukur latency
+"""
+
+import argparse
+import json
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ARTIFACT_PATH = 'kmeans_inference.json'
+
+features_for_clustering = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport',
+                          'pengeluaran_hiburan', 'rasio_pengeluaran', 'semester']
+
+class NearestCentroidPredictor:
+    """Pure-NumPy nearest-centroid predictor with the scaler folded into the centroids"""
+
+    def __init__(self, centers_raw, inv_scale, labels, features=features_for_clustering, dtype=np.float64):
+        self.dtype = np.dtype(dtype)
+        self.centers_raw = np.asarray(centers_raw, dtype=self.dtype)
+        self.inv_scale = np.asarray(inv_scale, dtype=self.dtype)
+        self.labels = list(labels)
+        self.features = list(features)
+
+    @classmethod
+    def from_sklearn(cls, kmeans_model, scaler, cluster_labels, dtype=None):
+        """Fold a fitted StandardScaler into the KMeans centroids.
+
+        ``dtype`` defaults to the dtype the KMeans model was fitted in.
+        """
+        centers_raw = kmeans_model.cluster_centers_ * scaler.scale_ + scaler.mean_
+        labels = [cluster_labels[i] for i in range(len(centers_raw))]
+        return cls(centers_raw, 1 / scaler.scale_, labels, dtype=dtype or kmeans_model.cluster_centers_.dtype)
+
+    @classmethod
+    def load(cls, path=ARTIFACT_PATH, dtype=None):
+        """Load an artifact; ``dtype`` overrides the one it was saved with"""
+        with open(path) as f:
+            artifact = json.load(f)
+        return cls(artifact['centers_raw'], artifact['inv_scale'], artifact['labels'], artifact['features'],
+                   dtype or artifact.get('dtype', 'float64'))
+
+    def save(self, path=ARTIFACT_PATH):
+        artifact = {
+            'features': self.features,
+            'dtype': self.dtype.name,
+            'centers_raw': self.centers_raw.tolist(),
+            'inv_scale': self.inv_scale.tolist(),
+            'labels': self.labels
+        }
+        with open(path, 'w') as f:
+            json.dump(artifact, f, indent=2)
+
+    def distances(self, X):
+        """Euclidean distances in scaled units from raw feature rows to every centroid"""
+        X = np.atleast_2d(np.asarray(X, dtype=self.dtype))
+        distances = np.empty((len(X), len(self.centers_raw)), dtype=self.dtype)
+        for i, center in enumerate(self.centers_raw):
+            distances[:, i] = (((X - center) * self.inv_scale) ** 2).sum(axis=1)
+        return np.sqrt(distances, out=distances)
+
+    def predict(self, X):
+        """Cluster id for each raw feature row"""
+        return self.distances(X).argmin(axis=1)
+
+    def predict_category(self, X):
+        """Category label for each raw feature row"""
+        return [self.labels[cluster] for cluster in self.predict(X)]
+
+def export_inference_artifact(kmeans_model, scaler, cluster_labels, path=ARTIFACT_PATH):
+    """Write the sklearn-free inference artifact next to the .pkl files"""
+    predictor = NearestCentroidPredictor.from_sklearn(kmeans_model, scaler, cluster_labels)
+    predictor.save(path)
+    return predictor
+
+def load_predictor(path=ARTIFACT_PATH, dtype=None):
+    """Load the compiled artifact, or build it from the .pkl files if it is missing"""
+    try:
+        return NearestCentroidPredictor.load(path, dtype)
+    except FileNotFoundError:
+        import joblib
+        return NearestCentroidPredictor.from_sklearn(
+            joblib.load('kmeans_model.pkl'), joblib.load('scaler.pkl'), joblib.load('cluster_labels.pkl'), dtype)
+
+def _cold_start_seconds(code, repeats=3):
+    """Best wall-clock time of a fresh interpreter running ``code``"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-W', 'ignore', '-c', code], check=True)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def verify(data_path='student_spending_data.npz'):
+    """Check the compiled predictor against scaler + KMeans and compare latency"""
+    import joblib
+    import pandas as pd
+    from storage import read_dataset
+
+    kmeans_model = joblib.load('kmeans_model.pkl')
+    scaler = joblib.load('scaler.pkl')
+    cluster_labels = joblib.load('cluster_labels.pkl')
+    predictor = NearestCentroidPredictor.load()
+
+    # Dataset training + contoh grid input aplikasi
+    df = read_dataset(data_path)
+    rng = np.random.default_rng(42)
+    n_grid = 200_000
+    uang_saku = rng.integers(2, 101, n_grid) * 50000.0
+    spending = rng.integers(0, 201, (n_grid, 3)) * 25000.0
+    spending = np.minimum(spending, uang_saku[:, None])
+    grid = np.column_stack([uang_saku, spending, spending.sum(axis=1) / uang_saku, rng.integers(1, 9, n_grid)])
+    X = np.vstack([df[features_for_clustering].to_numpy(), grid])
+
+    model_dtype = kmeans_model.cluster_centers_.dtype
+    expected = kmeans_model.predict(
+        scaler.transform(pd.DataFrame(X, columns=features_for_clustering)).astype(model_dtype, copy=False))
+    actual = predictor.predict(X)
+    print(f"Baris diuji            : {len(X):,}")
+    print(f"Cluster sama           : {(expected == actual).mean():.4%}")
+    print(f"Label sama             : {all(cluster_labels[i] == predictor.labels[i] for i in range(len(predictor.labels)))}")
+
+    # Latency satu prediksi (seperti di app.py)
+    row = X[:1]
+    row_frame = pd.DataFrame(row, columns=features_for_clustering)
+    n_calls = 2000
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        kmeans_model.predict(scaler.transform(row_frame).astype(model_dtype, copy=False))
+    sklearn_us = (time.perf_counter() - start) / n_calls * 1e6
+    start = time.perf_counter()
+    for _ in range(n_calls):
+        predictor.predict(row)
+    compiled_us = (time.perf_counter() - start) / n_calls * 1e6
+    print(f"\nLatency per prediksi   : sklearn {sklearn_us:.1f} us, compiled {compiled_us:.1f} us")
+
+    # Cold start: interpreter baru, import + load model
+    sklearn_cold = _cold_start_seconds(
+        "import joblib; joblib.load('kmeans_model.pkl'); joblib.load('scaler.pkl'); joblib.load('cluster_labels.pkl')")
+    compiled_cold = _cold_start_seconds("import inference; inference.NearestCentroidPredictor.load()")
+    print(f"Cold start (import+load): sklearn {sklearn_cold:.3f} s, compiled {compiled_cold:.3f} s")
+
+def main():
+    parser = argparse.ArgumentParser(description="Artifact inferensi K-Means tanpa scikit-learn")
+    parser.add_argument('--export', action='store_true', help="Buat kmeans_inference.json dari file .pkl")
+    parser.add_argument('--verify', action='store_true', help="Bandingkan dengan pipeline scaler + KMeans")
+    args = parser.parse_args()
+
+    if args.export:
+        import joblib
+        export_inference_artifact(joblib.load('kmeans_model.pkl'), joblib.load('scaler.pkl'),
+                                  joblib.load('cluster_labels.pkl'))
+        print(f"Artifact inferensi disimpan ke {ARTIFACT_PATH}")
+    if args.verify:
+        verify()
+
+if __name__ == "__main__":
+    main()
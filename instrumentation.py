@@ -0,0 +1,159 @@
+"""
+Instrumentasi ringan: span berwaktu dan counter, ditulis sebagai JSON lines.
+
+Nonaktif secara default; span() lalu mengembalikan context manager kosong yang
+sama setiap kali, sehingga biayanya hampir nol. Aktifkan dengan environment
+variable METRICS_FILE (run_all_script.py --metrics melakukannya untuk semua stage).
+Setiap event ditulis langsung dengan satu os.write ke file O_APPEND, sehingga
+aman dipakai dari beberapa proses sekaligus.
+
+Pemakaian:
+    METRICS_FILE=metrics.jsonl python kmeans_analysis.py
+    python instrumentation.py metrics.jsonl            # tabel ringkasan run terakhir
+"""
+
+import argparse
+import functools
+import json
+import os
+import time
+import uuid
+
+METRICS_FILE_ENV = 'METRICS_FILE'
+RUN_ID_ENV = 'METRICS_RUN_ID'
+
+_metrics_path = os.environ.get(METRICS_FILE_ENV) or None
+_run_id = os.environ.get(RUN_ID_ENV) or uuid.uuid4().hex[:12]
+_fd = None
+if _metrics_path is not None:
+    # Proses anak (subprocess, pool worker) ikut menulis ke run yang sama
+    os.environ[RUN_ID_ENV] = _run_id
+
+class _NullSpan:
+    """Shared do-nothing span returned while instrumentation is disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class _Span:
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.time()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        event = {'type': 'span', 'name': self.name, 'start': self.start,
+                 'seconds': time.perf_counter() - self._start}
+        if exc_type is not None:
+            event['error'] = exc_type.__name__
+        if self.attrs:
+            event['attrs'] = self.attrs
+        _write(event)
+        return False
+
+    def set(self, **attrs):
+        """Attach attributes known only inside the span (row counts, scores, ...)"""
+        self.attrs.update(attrs)
+
+def enabled():
+    return _metrics_path is not None
+
+def enable(path, run_id=None):
+    """Turn instrumentation on for this process (and subprocesses via the environment)"""
+    global _metrics_path, _run_id, _fd
+    _metrics_path = path
+    _run_id = run_id or _run_id
+    _fd = None
+    os.environ[METRICS_FILE_ENV] = path
+    os.environ[RUN_ID_ENV] = _run_id
+    return _run_id
+
+def span(name, **attrs):
+    """Time a block: ``with span('kmeans.k_sweep', k=7): ...``"""
+    if _metrics_path is None:
+        return _NULL_SPAN
+    return _Span(name, attrs)
+
+def timed(name):
+    """Decorator form of span(). When instrumentation is disabled at import
+    time the function is returned unchanged, so it costs nothing."""
+    def decorator(func):
+        if _metrics_path is None:
+            return func
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def count(name, value=1):
+    """Add ``value`` to counter ``name`` for this run"""
+    if _metrics_path is None:
+        return
+    _write({'type': 'counter', 'name': name, 'value': value})
+
+def _write(event):
+    global _fd
+    if _fd is None:
+        _fd = os.open(_metrics_path, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    event['run'] = _run_id
+    event['pid'] = os.getpid()
+    os.write(_fd, (json.dumps(event) + '\n').encode())
+
+def read_events(path, run_id=None):
+    """Events of one run from a metrics file (default: the last run in the file)"""
+    with open(path) as f:
+        events = [json.loads(line) for line in f if line.strip()]
+    if run_id is None and events:
+        run_id = events[-1]['run']
+    return [event for event in events if event['run'] == run_id]
+
+def print_summary(events):
+    """Per-span count, total, mean and max seconds, then counter totals"""
+    spans = {}
+    counters = {}
+    for event in events:
+        if event['type'] == 'span':
+            spans.setdefault(event['name'], []).append(event['seconds'])
+        else:
+            counters[event['name']] = counters.get(event['name'], 0) + event['value']
+
+    print(f"{'Span':<36} {'n':>5} {'total (s)':>10} {'rata2 (s)':>10} {'max (s)':>9}")
+    for name in sorted(spans):
+        seconds = spans[name]
+        print(f"{name:<36} {len(seconds):>5} {sum(seconds):>10.3f} "
+              f"{sum(seconds) / len(seconds):>10.4f} {max(seconds):>9.3f}")
+    if counters:
+        print(f"\n{'Counter':<36} {'nilai':>12}")
+        for name in sorted(counters):
+            print(f"{name:<36} {counters[name]:>12,}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Ringkasan file metrics JSON lines")
+    parser.add_argument('path', help="File metrics (JSON lines)")
+    parser.add_argument('--run-id', help="Id run yang diringkas (default: run terakhir di file)")
+    args = parser.parse_args()
+
+    events = read_events(args.path, args.run_id)
+    if not events:
+        print("Tidak ada event untuk run ini")
+        return
+    print(f"=== METRICS RUN {events[0]['run']} ({len(events)} event) ===")
+    print_summary(events)
+
+if __name__ == "__main__":
+    main()
@@ -1,144 +1,627 @@
+import argparse
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import pandas as pd
 import numpy as np
 import matplotlib.pyplot as plt
 from sklearn.preprocessing import StandardScaler
-from sklearn.cluster import KMeans
-from sklearn.metrics import silhouette_score
+from sklearn.cluster import KMeans, MiniBatchKMeans
+from sklearn.metrics import adjusted_rand_score
 import joblib
 
-# Load data
-df = pd.read_csv('student_spending_data.csv')
+from fast_plots import BackgroundRenderer, binned_counts, draw_density, use_headless_backend
+from feature_store import attach, ensure_feature_store, shareable
+from generate_data import write_shard
+from inference import NearestCentroidPredictor, export_inference_artifact, load_predictor
+from instrumentation import count, span
+from peer_index import PEER_INDEX_PATH, build_peer_index
+from percentiles import CategorySample, category_quantiles
+from silhouette import evaluate_silhouette
+from streaming_stats import chunk_stats, compute_stats
+from storage import (CLUSTERED_PATH, CLUSTERED_SHARDS_DIR, DATA_PATH, best_seconds, iter_dataset_chunks, read_dataset,
+                     save_table, to_typed_frame)
 
 # Preprocessing
-features_for_clustering = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport', 
+features_for_clustering = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport',
                           'pengeluaran_hiburan', 'rasio_pengeluaran', 'semester']
 
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(df[features_for_clustering])
+optimal_k = 3
 
-print("=== K-MEANS CLUSTERING ===")
+def label_clusters(cluster_means):
+    """Map cluster ids to Hemat/Sedang/Boros by ascending mean spending ratio"""
+    cluster_means = cluster_means.sort_values()
+    return {
+        cluster_means.index[0]: 'Hemat',
+        cluster_means.index[1]: 'Sedang',
+        cluster_means.index[2]: 'Boros'
+    }
 
-# Menentukan jumlah cluster optimal menggunakan Elbow Method
-inertias = []
-silhouette_scores = []
-K_range = range(2, 8)
+# Kolom yang diringkas per kategori untuk app.py
+summary_columns = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport',
+                   'pengeluaran_hiburan', 'total_pengeluaran', 'rasio_pengeluaran']
 
-for k in K_range:
-    kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
-    kmeans.fit(X_scaled)
-    inertias.append(kmeans.inertia_)
-    silhouette_scores.append(silhouette_score(X_scaled, kmeans.labels_))
+def category_sums(df):
+    """Per-category column sums and row counts of a clustered frame (or chunk)"""
+    grouped = df.groupby('kategori_pengeluaran')
+    return grouped[summary_columns].sum(), grouped.size()
 
-# Plot Elbow Method
-plt.figure(figsize=(12, 4))
+def save_cluster_summary(sums, counts, quantiles=None, inertia=None, path='cluster_summary.json'):
+    """Write the small per-category summary that app.py runs from.
 
-plt.subplot(1, 2, 1)
-plt.plot(K_range, inertias, 'bo-')
-plt.title('Elbow Method untuk Optimal K')
-plt.xlabel('Jumlah Cluster (K)')
-plt.ylabel('Inertia')
-plt.grid(True)
+    ``quantiles`` are the per-category percentile tables from percentiles.py.
+    ``inertia`` is the total squared distance of all training rows to their
+    centroid, the baseline update_model.py compares new data against.
+    """
+    n_total = int(counts.sum())
+    summary = {
+        'n_samples': n_total,
+        'global_means': {column: float(sums[column].sum() / n_total) for column in summary_columns},
+        'categories': {
+            kategori: {
+                'count': int(counts[kategori]),
+                'means': {column: float(sums.loc[kategori, column] / counts[kategori]) for column in summary_columns}
+            }
+            for kategori in counts.sort_values(ascending=False).index
+        }
+    }
+    if inertia is not None:
+        summary['inertia'] = float(inertia)
+    for kategori, tables in (quantiles or {}).items():
+        summary['categories'][kategori]['quantiles'] = tables
+    with open(path, 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
 
-plt.subplot(1, 2, 2)
-plt.plot(K_range, silhouette_scores, 'ro-')
-plt.title('Silhouette Score untuk setiap K')
-plt.xlabel('Jumlah Cluster (K)')
-plt.ylabel('Silhouette Score')
-plt.grid(True)
+def save_artifacts(kmeans_model, scaler, cluster_labels):
+    """Save model, scaler and cluster labels, plus the sklearn-free artifact for app.py"""
+    joblib.dump(kmeans_model, 'kmeans_model.pkl')
+    joblib.dump(scaler, 'scaler.pkl')
+    joblib.dump(cluster_labels, 'cluster_labels.pkl')
+    return export_inference_artifact(kmeans_model, scaler, cluster_labels)
 
-plt.tight_layout()
-plt.savefig('optimal_k_analysis.png', dpi=300, bbox_inches='tight')
-plt.show()
+def predict_clusters(kmeans_model, scaler, X):
+    """Cluster id per raw feature row, scaled in the dtype the model was fitted in"""
+    return kmeans_model.predict(scaler.transform(X).astype(kmeans_model.cluster_centers_.dtype, copy=False))
 
-# Pilih K optimal (berdasarkan analisis, kita pilih K=3 untuk kategori Hemat, Sedang, Boros)
-optimal_k = 3
-print(f"\nMenggunakan K = {optimal_k} cluster")
-
-# Fitting final model
-kmeans_final = KMeans(n_clusters=optimal_k, random_state=42, n_init=10)
-df['cluster'] = kmeans_final.fit_predict(X_scaled)
-
-# Analisis hasil clustering
-print("\n=== HASIL CLUSTERING ===")
-print(f"Silhouette Score: {silhouette_score(X_scaled, df['cluster']):.3f}")
-
-# Analisis karakteristik setiap cluster
-cluster_analysis = df.groupby('cluster').agg({
-    'uang_saku': ['mean', 'std'],
-    'total_pengeluaran': ['mean', 'std'],
-    'rasio_pengeluaran': ['mean', 'std'],
-    'pengeluaran_makanan': 'mean',
-    'pengeluaran_transport': 'mean',
-    'pengeluaran_hiburan': 'mean',
-    'semester': 'mean'
-}).round(0)
-
-print("\nKarakteristik setiap cluster:")
-print(cluster_analysis)
-
-# Labeling cluster berdasarkan rasio pengeluaran
-cluster_means = df.groupby('cluster')['rasio_pengeluaran'].mean().sort_values()
-cluster_labels = {
-    cluster_means.index[0]: 'Hemat',
-    cluster_means.index[1]: 'Sedang', 
-    cluster_means.index[2]: 'Boros'
-}
-
-df['kategori_pengeluaran'] = df['cluster'].map(cluster_labels)
-
-print(f"\nLabel cluster:")
-for cluster, label in cluster_labels.items():
-    print(f"Cluster {cluster}: {label}")
-
-# Distribusi cluster
-print(f"\nDistribusi kategori:")
-print(df['kategori_pengeluaran'].value_counts())
-
-# Visualisasi cluster
-plt.figure(figsize=(15, 10))
-
-plt.subplot(2, 2, 1)
-colors = ['green', 'orange', 'red']
-for i, (cluster, label) in enumerate(cluster_labels.items()):
-    cluster_data = df[df['cluster'] == cluster]
-    plt.scatter(cluster_data['uang_saku'], cluster_data['total_pengeluaran'], 
-               c=colors[i], label=label, alpha=0.6)
-plt.xlabel('Uang Saku (Rp)')
-plt.ylabel('Total Pengeluaran (Rp)')
-plt.title('Cluster berdasarkan Uang Saku vs Total Pengeluaran')
-plt.legend()
-
-plt.subplot(2, 2, 2)
-for i, (cluster, label) in enumerate(cluster_labels.items()):
-    cluster_data = df[df['cluster'] == cluster]
-    plt.scatter(cluster_data['rasio_pengeluaran'], cluster_data['semester'], 
-               c=colors[i], label=label, alpha=0.6)
-plt.xlabel('Rasio Pengeluaran')
-plt.ylabel('Semester')
-plt.title('Cluster berdasarkan Rasio Pengeluaran vs Semester')
-plt.legend()
-
-plt.subplot(2, 2, 3)
-spending_by_cluster = df.groupby('kategori_pengeluaran')[['pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan']].mean()
-spending_by_cluster.plot(kind='bar', ax=plt.gca())
-plt.title('Rata-rata Pengeluaran per Kategori')
-plt.xticks(rotation=45)
-plt.ylabel('Pengeluaran (Rp)')
-
-plt.subplot(2, 2, 4)
-df['kategori_pengeluaran'].value_counts().plot(kind='pie', autopct='%1.1f%%')
-plt.title('Distribusi Kategori Pengeluaran')
-
-plt.tight_layout()
-plt.savefig('clustering_results.png', dpi=300, bbox_inches='tight')
-plt.show()
-
-# Save model dan scaler
-joblib.dump(kmeans_final, 'kmeans_model.pkl')
-joblib.dump(scaler, 'scaler.pkl')
-joblib.dump(cluster_labels, 'cluster_labels.pkl')
-
-# Save hasil clustering
-df.to_csv('student_spending_clustered.csv', index=False)
-
-print("\nModel dan hasil clustering berhasil disimpan!")
\ No newline at end of file
+def fit_k(task):
+    """Fit KMeans for one K and score it; runs inside a pool worker"""
+    X_scaled, k, init = task
+    X_scaled = attach(X_scaled)
+    start = time.perf_counter()
+    if init is None:
+        kmeans = KMeans(n_clusters=k, random_state=42, n_init=10)
+    else:
+        kmeans = KMeans(n_clusters=k, random_state=42, init=init, n_init=1)
+    with span('kmeans.fit_k', k=k):
+        kmeans.fit(X_scaled)
+    with span('kmeans.silhouette', k=k):
+        silhouette = evaluate_silhouette(X_scaled, kmeans.labels_)
+    return {
+        'k': k,
+        'model': kmeans,
+        'inertia': kmeans.inertia_,
+        'silhouette': silhouette['score'],
+        'silhouette_eval': silhouette,
+        'n_iter': kmeans.n_iter_,
+        'seconds': time.perf_counter() - start
+    }
+
+def warm_start_centers(X_scaled, centers):
+    """Previous K's centroids plus the point farthest from all of them"""
+    distances = np.full(len(X_scaled), np.inf)
+    for center in centers:
+        np.minimum(distances, ((X_scaled - center) ** 2).sum(axis=1), out=distances)
+    return np.vstack([centers, X_scaled[np.argmax(distances)]])
+
+def run_k_sweep(X_scaled, K_range, workers=1, warm_start=False):
+    """Fit every K candidate and return one result dict per K.
+
+    Without warm start the candidates are independent and are spread over a
+    process pool of ``workers``. With warm start each K is initialised from
+    the previous K's centroids, which makes the sweep a chain, so it runs
+    sequentially in this process.
+    """
+    if warm_start:
+        results = []
+        init = None
+        for k in K_range:
+            result = fit_k((X_scaled, k, init))
+            results.append(result)
+            init = warm_start_centers(X_scaled, result['model'].cluster_centers_)
+        return results
+
+    # Matriks memory-mapped dikirim sebagai path, worker membukanya sendiri tanpa salinan
+    tasks = [(shareable(X_scaled), k, None) for k in K_range]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(fit_k, tasks))
+    return [fit_k(task) for task in tasks]
+
+def plot_optimal_k(K_range, inertias, silhouette_scores, path='optimal_k_analysis.png', dpi=300):
+    """Elbow and silhouette curves of the K sweep"""
+    plt.figure(figsize=(12, 4))
+
+    plt.subplot(1, 2, 1)
+    plt.plot(K_range, inertias, 'bo-')
+    plt.title('Elbow Method untuk Optimal K')
+    plt.xlabel('Jumlah Cluster (K)')
+    plt.ylabel('Inertia')
+    plt.grid(True)
+
+    plt.subplot(1, 2, 2)
+    plt.plot(K_range, silhouette_scores, 'ro-')
+    plt.title('Silhouette Score untuk setiap K')
+    plt.xlabel('Jumlah Cluster (K)')
+    plt.ylabel('Silhouette Score')
+    plt.grid(True)
+
+    plt.tight_layout()
+    plt.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+cluster_colors = ['green', 'orange', 'red']
+
+def clustering_bins(df, cluster_labels, bins=200):
+    """Per-cluster density grids and category aggregates for the fast figure"""
+    # Urutan grup mengikuti cluster_labels agar warna sama dengan plot biasa
+    group_of_cluster = np.zeros(max(cluster_labels) + 1, dtype=np.intp)
+    for i, cluster in enumerate(cluster_labels):
+        group_of_cluster[cluster] = i
+    groups = group_of_cluster[df['cluster'].to_numpy()]
+    n_groups = len(cluster_labels)
+    return {
+        'labels': list(cluster_labels.values()),
+        'spending': binned_counts(df['uang_saku'], df['total_pengeluaran'], bins, groups, n_groups),
+        'ratio_semester': binned_counts(df['rasio_pengeluaran'], df['semester'], (bins, 8), groups, n_groups,
+                                        y_range=(0.5, 8.5)),
+        'spending_by_cluster': df.groupby('kategori_pengeluaran')[
+            ['pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan']].mean(),
+        'category_counts': df['kategori_pengeluaran'].value_counts()
+    }
+
+def render_clustering_fast(data, path='clustering_results.png', dpi=150):
+    """Clustering figure with per-cluster density images instead of per-point scatters"""
+    fig, axes = plt.subplots(2, 2, figsize=(15, 10))
+    colors = cluster_colors[:len(data['labels'])]
+
+    counts, x_edges, y_edges = data['spending']
+    draw_density(axes[0, 0], counts, x_edges, y_edges, colors, data['labels'])
+    axes[0, 0].set_xlabel('Uang Saku (Rp)')
+    axes[0, 0].set_ylabel('Total Pengeluaran (Rp)')
+    axes[0, 0].set_title('Cluster berdasarkan Uang Saku vs Total Pengeluaran')
+
+    counts, x_edges, y_edges = data['ratio_semester']
+    draw_density(axes[0, 1], counts, x_edges, y_edges, colors, data['labels'])
+    axes[0, 1].set_xlabel('Rasio Pengeluaran')
+    axes[0, 1].set_ylabel('Semester')
+    axes[0, 1].set_title('Cluster berdasarkan Rasio Pengeluaran vs Semester')
+
+    data['spending_by_cluster'].plot(kind='bar', ax=axes[1, 0])
+    axes[1, 0].set_title('Rata-rata Pengeluaran per Kategori')
+    axes[1, 0].tick_params(axis='x', rotation=45)
+    axes[1, 0].set_ylabel('Pengeluaran (Rp)')
+
+    data['category_counts'].plot(kind='pie', autopct='%1.1f%%', ax=axes[1, 1])
+    axes[1, 1].set_title('Distribusi Kategori Pengeluaran')
+
+    fig.tight_layout()
+    fig.savefig(path, dpi=dpi, bbox_inches='tight')
+    return path
+
+def run_full_batch(data_path, workers=1, warm_start=False, fast=False, dpi=300, plot_workers=2, dtype=np.float64):
+    """Original in-memory pipeline: elbow/silhouette sweep, final KMeans, plots.
+
+    With ``fast`` the figures are binned density plots rendered in background
+    processes (``plot_workers``) and ``plt.show()`` is skipped. ``dtype`` is
+    the dtype of the scaled matrix, and therefore of the KMeans fit and of
+    the exported inference artifact.
+    """
+    # Load data
+    with span('kmeans.load'):
+        df = read_dataset(data_path)
+    count('kmeans.rows', len(df))
+
+    # Matriks ter-scale dan scaler diambil dari feature store (dibangun sekali per dataset)
+    with span('kmeans.scale'):
+        store = ensure_feature_store(data_path, dtype=dtype)
+        X_scaled = store.X
+        scaler = store.scaler()
+
+    print("=== K-MEANS CLUSTERING ===")
+
+    # Menentukan jumlah cluster optimal menggunakan Elbow Method
+    K_range = range(2, 8)
+
+    sweep_start = time.perf_counter()
+    with span('kmeans.k_sweep', workers=workers, warm_start=warm_start):
+        sweep = run_k_sweep(X_scaled, K_range, workers, warm_start)
+    sweep_seconds = time.perf_counter() - sweep_start
+    inertias = [result['inertia'] for result in sweep]
+    silhouette_scores = [result['silhouette'] for result in sweep]
+
+    print(f"{'K':>2} {'inertia':>12} {'silhouette':>10} {'iterasi':>8} {'waktu (s)':>10}")
+    for result in sweep:
+        print(f"{result['k']:>2} {result['inertia']:>12.2f} {result['silhouette']:>10.3f} "
+              f"{result['n_iter']:>8} {result['seconds']:>10.3f}")
+    print(f"Total wall-clock sweep: {sweep_seconds:.3f} s "
+          f"(jumlah waktu per K: {sum(r['seconds'] for r in sweep):.3f} s)")
+
+    # Plot Elbow Method
+    renderer = BackgroundRenderer(plot_workers) if fast else None
+    with span('kmeans.plot', figure='optimal_k', fast=fast):
+        if renderer:
+            renderer.submit(plot_optimal_k, list(K_range), inertias, silhouette_scores, 'optimal_k_analysis.png', dpi)
+        else:
+            plot_optimal_k(K_range, inertias, silhouette_scores, dpi=dpi)
+            plt.show()
+
+    # Pilih K optimal (berdasarkan analisis, kita pilih K=3 untuk kategori Hemat, Sedang, Boros)
+    print(f"\nMenggunakan K = {optimal_k} cluster")
+
+    # Final model diambil dari hasil sweep, tidak perlu fitting ulang. Model sweep warm start hanya punya
+    # n_init=1 dari centroid K sebelumnya, jadi K final di-fit ulang tanpa warm start (n_init=10)
+    if warm_start:
+        with span('kmeans.final_fit', k=optimal_k):
+            final_result = fit_k((X_scaled, optimal_k, None))
+        print(f"Fit final tanpa warm start: inertia {final_result['inertia']:.2f} "
+              f"({final_result['seconds']:.3f} s)")
+    else:
+        final_result = next(result for result in sweep if result['k'] == optimal_k)
+    kmeans_final = final_result['model']
+    df['cluster'] = kmeans_final.labels_
+
+    # Analisis hasil clustering
+    print("\n=== HASIL CLUSTERING ===")
+    silhouette = final_result['silhouette_eval']
+    if silhouette['ci'] is None:
+        print(f"Silhouette Score: {silhouette['score']:.3f}")
+    else:
+        low, high = silhouette['ci']
+        print(f"Silhouette Score: {silhouette['score']:.3f} (estimasi sampled, 95% CI {low:.3f} - {high:.3f})")
+
+    # Analisis karakteristik setiap cluster
+    cluster_analysis = df.groupby('cluster').agg({
+        'uang_saku': ['mean', 'std'],
+        'total_pengeluaran': ['mean', 'std'],
+        'rasio_pengeluaran': ['mean', 'std'],
+        'pengeluaran_makanan': 'mean',
+        'pengeluaran_transport': 'mean',
+        'pengeluaran_hiburan': 'mean',
+        'semester': 'mean'
+    }).round(0)
+
+    print("\nKarakteristik setiap cluster:")
+    print(cluster_analysis)
+
+    # Labeling cluster berdasarkan rasio pengeluaran
+    cluster_labels = label_clusters(df.groupby('cluster')['rasio_pengeluaran'].mean())
+
+    df['kategori_pengeluaran'] = df['cluster'].map(cluster_labels)
+
+    print(f"\nLabel cluster:")
+    for cluster, label in cluster_labels.items():
+        print(f"Cluster {cluster}: {label}")
+
+    # Distribusi cluster
+    print(f"\nDistribusi kategori:")
+    print(df['kategori_pengeluaran'].value_counts())
+
+    # Visualisasi cluster
+    with span('kmeans.plot', figure='clustering', fast=fast):
+        if renderer:
+            renderer.submit(render_clustering_fast, clustering_bins(df, cluster_labels), 'clustering_results.png', dpi)
+        else:
+            plot_clustering(df, cluster_labels, dpi)
+
+    with span('kmeans.save'):
+        # Save model dan scaler
+        predictor = save_artifacts(kmeans_final, scaler, cluster_labels)
+
+        # Save hasil clustering (tabel bertipe + ekspor CSV) dan ringkasannya untuk app.py
+        save_table(df, CLUSTERED_PATH, 'student_spending_clustered.csv')
+        save_cluster_summary(*category_sums(df), category_quantiles(df), kmeans_final.inertia_)
+
+    # Indeks mahasiswa mirip untuk app.py, dari matriks ter-scale yang sama
+    with span('kmeans.peer_index'):
+        build_peer_index(X_scaled, df, scaler, predictor)
+
+    if renderer:
+        with span('kmeans.plot_wait'):
+            renderer.wait()
+    print("\nModel dan hasil clustering berhasil disimpan!")
+
+def plot_clustering(df, cluster_labels, dpi=300):
+    """Original clustering figure with one scatter point per student"""
+    # Satu pass untuk indeks baris per cluster, bukan satu mask per cluster
+    cluster_rows = df.groupby('cluster').indices
+
+    plt.figure(figsize=(15, 10))
+
+    plt.subplot(2, 2, 1)
+    for i, (cluster, label) in enumerate(cluster_labels.items()):
+        cluster_data = df.iloc[cluster_rows[cluster]]
+        plt.scatter(cluster_data['uang_saku'], cluster_data['total_pengeluaran'],
+                   c=cluster_colors[i], label=label, alpha=0.6)
+    plt.xlabel('Uang Saku (Rp)')
+    plt.ylabel('Total Pengeluaran (Rp)')
+    plt.title('Cluster berdasarkan Uang Saku vs Total Pengeluaran')
+    plt.legend()
+
+    plt.subplot(2, 2, 2)
+    for i, (cluster, label) in enumerate(cluster_labels.items()):
+        cluster_data = df.iloc[cluster_rows[cluster]]
+        plt.scatter(cluster_data['rasio_pengeluaran'], cluster_data['semester'],
+                   c=cluster_colors[i], label=label, alpha=0.6)
+    plt.xlabel('Rasio Pengeluaran')
+    plt.ylabel('Semester')
+    plt.title('Cluster berdasarkan Rasio Pengeluaran vs Semester')
+    plt.legend()
+
+    plt.subplot(2, 2, 3)
+    spending_by_cluster = df.groupby('kategori_pengeluaran')[['pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan']].mean()
+    spending_by_cluster.plot(kind='bar', ax=plt.gca())
+    plt.title('Rata-rata Pengeluaran per Kategori')
+    plt.xticks(rotation=45)
+    plt.ylabel('Pengeluaran (Rp)')
+
+    plt.subplot(2, 2, 4)
+    df['kategori_pengeluaran'].value_counts().plot(kind='pie', autopct='%1.1f%%')
+    plt.title('Distribusi Kategori Pengeluaran')
+
+    plt.tight_layout()
+    plt.savefig('clustering_results.png', dpi=dpi, bbox_inches='tight')
+    plt.show()
+
+def fit_minibatch(chunk_source, n_clusters=optimal_k, batch_size=4096, n_epochs=2, random_state=42, scaler=None,
+                  dtype=np.float64):
+    """Fit a StandardScaler and MiniBatchKMeans incrementally, one chunk at a time.
+
+    ``chunk_source`` is a zero-argument callable returning a fresh iterator of
+    DataFrame chunks, because the data is streamed several times: once for
+    the scaler (skipped when a fitted ``scaler`` is passed), ``n_epochs``
+    times for the centroids and once for labelling. Centroids are fitted in
+    ``dtype``. Returns ``(kmeans, scaler, cluster_labels, inertia)``, where
+    ``inertia`` is measured on all rows in the labelling pass
+    (``kmeans.inertia_`` of MiniBatchKMeans only covers the last mini-batch).
+    """
+    # Pass 1: statistik scaler (mean dan varians satu pass, bisa digabung antar chunk)
+    if scaler is None:
+        scaler = chunk_stats(chunk_source()).to_scaler()
+
+    # Pass 2: update centroid per mini-batch
+    kmeans = MiniBatchKMeans(n_clusters=n_clusters, random_state=random_state,
+                             batch_size=batch_size, n_init=3)
+    for epoch in range(n_epochs):
+        for chunk in chunk_source():
+            X_scaled = scaler.transform(chunk[features_for_clustering]).astype(dtype, copy=False)
+            if not hasattr(kmeans, 'cluster_centers_'):
+                # Inisialisasi centroid dari chunk pertama secara utuh
+                kmeans.partial_fit(X_scaled)
+                continue
+            for start in range(0, len(X_scaled), batch_size):
+                kmeans.partial_fit(X_scaled[start:start + batch_size])
+
+    # Pass 3: rata-rata rasio pengeluaran per cluster untuk labeling, dan inertia semua baris
+    ratio_sum = np.zeros(n_clusters)
+    counts = np.zeros(n_clusters, dtype=np.int64)
+    inertia = 0.0
+    for chunk in chunk_source():
+        X_scaled = scaler.transform(chunk[features_for_clustering]).astype(dtype, copy=False)
+        clusters = kmeans.predict(X_scaled)
+        inertia += float(((X_scaled - kmeans.cluster_centers_[clusters]) ** 2).sum(dtype=np.float64))
+        ratio_sum += np.bincount(clusters, weights=chunk['rasio_pengeluaran'], minlength=n_clusters)
+        counts += np.bincount(clusters, minlength=n_clusters)
+    cluster_labels = label_clusters(pd.Series(ratio_sum / np.maximum(counts, 1)))
+
+    return kmeans, scaler, cluster_labels, inertia
+
+def run_minibatch(source, chunk_size, workers=1, dtype=np.float64):
+    """Out-of-core training: stream the data, save artifacts and the clustered rows.
+
+    The .npz table cannot be appended to, so the clustered rows are written
+    as one .npz shard per chunk plus manifest.json in CLUSTERED_SHARDS_DIR,
+    and streamed to the CSV export. A clustered table or peer index from an
+    earlier run is removed, because it belongs to the old model; the index
+    needs all rows in memory and is rebuilt with peer_index.py. Scaler
+    statistics of a shard manifest are computed in ``workers`` processes.
+    """
+    print("=== MINI-BATCH K-MEANS (OUT-OF-CORE) ===")
+    chunk_source = lambda: iter_dataset_chunks(source, chunk_size)
+    scaler = None
+    if workers > 1 and source.endswith('manifest.json'):
+        scaler = compute_stats(source, chunk_size=chunk_size, workers=workers).to_scaler()
+    with span('kmeans.minibatch_fit', chunk_size=chunk_size):
+        kmeans, scaler, cluster_labels, inertia = fit_minibatch(chunk_source, scaler=scaler, dtype=dtype)
+
+    print(f"\nLabel cluster:")
+    for cluster, label in cluster_labels.items():
+        print(f"Cluster {cluster}: {label}")
+
+    with span('kmeans.save'):
+        save_artifacts(kmeans, scaler, cluster_labels)
+
+        # Hasil dan indeks dari model lama tidak boleh tertinggal
+        output = 'student_spending_clustered.csv'
+        for stale in (output, CLUSTERED_PATH, PEER_INDEX_PATH):
+            if os.path.exists(stale):
+                os.remove(stale)
+        shutil.rmtree(CLUSTERED_SHARDS_DIR, ignore_errors=True)
+        os.makedirs(CLUSTERED_SHARDS_DIR)
+
+        # Tulis hasil clustering per chunk agar memori tetap konstan
+        sums, counts = None, None
+        sample = CategorySample()
+        shards = []
+        for index, chunk in enumerate(chunk_source()):
+            chunk['cluster'] = predict_clusters(kmeans, scaler, chunk[features_for_clustering])
+            chunk['kategori_pengeluaran'] = chunk['cluster'].map(cluster_labels)
+            chunk_sums, chunk_counts = category_sums(chunk)
+            sums = chunk_sums if sums is None else sums.add(chunk_sums, fill_value=0)
+            counts = chunk_counts if counts is None else counts.add(chunk_counts, fill_value=0)
+            sample.update(chunk)
+            chunk = to_typed_frame(chunk)
+            shards.append(write_shard(chunk, CLUSTERED_SHARDS_DIR, index, formats=('npz',)))
+            chunk.to_csv(output, mode='a', header=not os.path.exists(output), index=False)
+        manifest = {
+            'n_samples': int(counts.sum()),
+            'chunk_size': chunk_size,
+            'formats': ['npz'],
+            'columns': list(chunk.columns),
+            'shards': shards
+        }
+        manifest_path = os.path.join(CLUSTERED_SHARDS_DIR, 'manifest.json')
+        with open(manifest_path, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        save_cluster_summary(sums, counts, sample.quantiles(), inertia)
+    count('kmeans.rows', int(counts.sum()))
+
+    print(f"\nDistribusi kategori:")
+    print(counts.astype(int).sort_values(ascending=False))
+    print(f"\nModel dan hasil clustering berhasil disimpan! ({len(shards)} shard di {manifest_path})")
+    print("Indeks mahasiswa mirip untuk app.py dibangun terpisah (memuat semua baris ke memori):")
+    print(f"  python peer_index.py --build --input {manifest_path}")
+
+def compare_with_full_batch(data_path, chunk_size):
+    """Compare mini-batch quality against the full-batch KMeans on in-RAM data"""
+    df = read_dataset(data_path)
+    print(f"=== PERBANDINGAN FULL-BATCH vs MINI-BATCH ({len(df):,} baris) ===")
+
+    scaler_full = StandardScaler()
+    X_full = scaler_full.fit_transform(df[features_for_clustering])
+    kmeans_full = KMeans(n_clusters=optimal_k, random_state=42, n_init=10).fit(X_full)
+    labels_full = label_clusters(df.groupby(kmeans_full.labels_)['rasio_pengeluaran'].mean())
+
+    chunk_source = lambda: (df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size))
+    kmeans_mb, scaler_mb, labels_mb, _ = fit_minibatch(chunk_source)
+
+    # Evaluasi kedua model pada ruang fitur full-batch
+    clusters_mb = kmeans_mb.predict(scaler_mb.transform(df[features_for_clustering]))
+    centers_raw = kmeans_mb.cluster_centers_ * scaler_mb.scale_ + scaler_mb.mean_
+    centers_full = (centers_raw - scaler_full.mean_) / scaler_full.scale_
+    inertia_mb = ((X_full - centers_full[clusters_mb]) ** 2).sum()
+    category_full = pd.Series(kmeans_full.labels_).map(labels_full)
+    category_mb = pd.Series(clusters_mb).map(labels_mb)
+
+    comparison = pd.DataFrame({
+        'full_batch': [
+            kmeans_full.inertia_,
+            evaluate_silhouette(X_full, kmeans_full.labels_)['score'],
+        ],
+        'mini_batch': [
+            inertia_mb,
+            evaluate_silhouette(X_full, clusters_mb)['score'],
+        ]
+    }, index=['inertia', 'silhouette'])
+    print(comparison.round(4))
+    print(f"\nSelisih inertia relatif : {inertia_mb / kmeans_full.inertia_ - 1:+.2%}")
+    print(f"Adjusted Rand Index     : {adjusted_rand_score(kmeans_full.labels_, clusters_mb):.4f}")
+    print(f"Kesamaan kategori       : {(category_full == category_mb).mean():.2%}")
+    print(f"Selisih mean scaler max : {np.abs(scaler_full.mean_ - scaler_mb.mean_).max():.3e}")
+
+def compare_dtypes(data_path):
+    """Train and predict in float64 and float32 and compare memory, speed and cluster assignments"""
+    df = read_dataset(data_path)
+    print(f"=== PERBANDINGAN FLOAT64 vs FLOAT32 ({len(df):,} baris) ===")
+    X_raw = df[features_for_clustering].to_numpy(np.float64)
+    scaler = chunk_stats([df]).to_scaler()
+
+    results = {}
+    for dtype in (np.float64, np.float32):
+        name = np.dtype(dtype).name
+        # Waktu terbaik dari beberapa ulangan, agar dtype yang jalan pertama tidak menanggung warm-up
+        scale = lambda: scaler.transform(df[features_for_clustering]).astype(dtype)
+        X_scaled = scale()
+        scale_seconds = best_seconds(scale)
+        kmeans = KMeans(n_clusters=optimal_k, random_state=42, n_init=10)
+        # random_state tetap: setiap ulangan fit menghasilkan model yang sama
+        fit_seconds = best_seconds(lambda: kmeans.fit(X_scaled))
+        cluster_labels = label_clusters(df.groupby(kmeans.labels_)['rasio_pengeluaran'].mean())
+        predictor = NearestCentroidPredictor.from_sklearn(kmeans, scaler, cluster_labels)
+        X_input = X_raw.astype(dtype)
+        predict_seconds = best_seconds(lambda: predictor.predict(X_input))
+        results[name] = {
+            'predictor': predictor,
+            'categories': pd.Series(kmeans.labels_).map(cluster_labels).to_numpy(),
+            'predicted': np.array(predictor.labels)[predictor.predict(X_input)],
+            'matrix_bytes': X_scaled.nbytes,
+            'scale_seconds': scale_seconds,
+            'fit_seconds': fit_seconds,
+            'n_iter': kmeans.n_iter_,
+            'inertia': float(kmeans.inertia_),
+            'predict_rows_per_second': len(X_raw) / predict_seconds
+        }
+
+    r64, r32 = results['float64'], results['float32']
+    comparison = pd.DataFrame({
+        name: [r['matrix_bytes'] / 1e6, r['scale_seconds'], r['fit_seconds'], r['n_iter'], r['inertia'],
+               r['predict_rows_per_second']]
+        for name, r in results.items()
+    }, index=['matriks ter-scale (MB)', 'scaling (s)', 'fit KMeans (s)', 'iterasi KMeans', 'inertia',
+              'prediksi (baris/s)'])
+    comparison['float32 / float64'] = comparison['float32'] / comparison['float64']
+    print(comparison.to_string(float_format=lambda value: f"{value:,.3f}"))
+
+    # Model float64 yang sama dihitung dengan jarak float32: efek presisi prediksi saja
+    predictor_64 = r64['predictor']
+    predictor_as_32 = NearestCentroidPredictor(predictor_64.centers_raw, predictor_64.inv_scale,
+                                               predictor_64.labels, dtype=np.float32)
+    same_distance_dtype = (predictor_64.predict(X_raw) == predictor_as_32.predict(X_raw)).mean()
+    agreement = (r64['categories'] == r32['categories']).mean()
+    print(f"\nKategori training sama (fit float64 vs float32)   : {agreement:.4%}")
+    print(f"Kategori prediksi sama (predictor float64 vs float32): {(r64['predicted'] == r32['predicted']).mean():.4%}")
+    print(f"Model float64, jarak dihitung float32             : {same_distance_dtype:.4%}")
+    return agreement
+
+def main():
+    parser = argparse.ArgumentParser(description="Analisis K-Means clustering pengeluaran mahasiswa")
+    parser.add_argument('--input', default=DATA_PATH,
+                        help="Tabel .npz, file CSV atau manifest.json shard dari generate_data.py --stream")
+    parser.add_argument('--mode', choices=['full', 'minibatch'], default='full',
+                        help="full = KMeans di memori (default), minibatch = MiniBatchKMeans out-of-core")
+    parser.add_argument('--chunk-size', type=int, default=100_000, help="Jumlah baris per chunk untuk mode minibatch")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Jumlah proses untuk sweep K (mode minibatch: statistik scaler per shard)")
+    parser.add_argument('--warm-start', action='store_true',
+                        help="Inisialisasi setiap K dari centroid K sebelumnya (sweep berjalan berurutan)")
+    parser.add_argument('--build-lut', action='store_true',
+                        help="Bangun tabel lookup kategori (category_lut/) untuk grid input app.py")
+    parser.add_argument('--fast', action='store_true',
+                        help="Mode headless: scatter di-bin menjadi gambar densitas, dirender paralel tanpa plt.show()")
+    parser.add_argument('--dpi', type=int, default=300, help="Resolusi PNG")
+    parser.add_argument('--plot-workers', type=int, default=2, help="Jumlah proses render untuk mode --fast")
+    parser.add_argument('--compare', action='store_true',
+                        help="Bandingkan kualitas mini-batch dengan full-batch pada data yang muat di RAM")
+    parser.add_argument('--dtype', choices=['float64', 'float32'], default='float64',
+                        help="Tipe data scaling, fit KMeans dan artifact inferensi")
+    parser.add_argument('--compare-dtypes', action='store_true',
+                        help="Bandingkan memori, kecepatan dan kesamaan cluster float64 vs float32")
+    args = parser.parse_args()
+
+    if args.fast:
+        use_headless_backend()
+
+    if args.compare:
+        compare_with_full_batch(args.input, args.chunk_size)
+    elif args.compare_dtypes:
+        compare_dtypes(args.input)
+    elif args.mode == 'minibatch':
+        run_minibatch(args.input, args.chunk_size, args.workers, args.dtype)
+    else:
+        run_full_batch(args.input, args.workers, args.warm_start, args.fast, args.dpi, args.plot_workers, args.dtype)
+
+    if args.build_lut and not (args.compare or args.compare_dtypes):
+        from lookup_table import build_lookup_table, print_size_report, verify_lookup_table
+        predictor = load_predictor()
+        print("\n=== TABEL LOOKUP KATEGORI ===")
+        lut = build_lookup_table(predictor)
+        print_size_report(lut)
+        agreement, fallback_rate = verify_lookup_table(lut, predictor, 100_000)
+        print(f"Kesamaan dengan model  : {agreement:.4%} dari input yang dijawab tabel")
+        print(f"Input fallback ke model: {fallback_rate:.4%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,294 @@
+"""
+Tabel lookup kategori untuk grid input sidebar app.py.
+
+Sidebar membatasi input ke grid diskrit (uang saku 100rb-5jt kelipatan 50rb,
+pengeluaran kelipatan 25rb sampai sebesar uang saku, semester 1-8), jadi setiap
+jawaban bisa dihitung di muka dari model.
+
+Untuk (uang saku, semester, makanan, transport) tetap, selisih jarak kuadrat antar
+centroid linear terhadap hiburan, sehingga sepanjang sumbu hiburan cluster hanya
+berganti paling banyak K-1 kali. Setiap baris disimpan sebagai titik pergantian
+(breaks) dan kode cluster per segmen, bukan satu byte per sel.
+
+Pemakaian:
+    python lookup_table.py --build    # bangun dari kmeans_inference.json
+    python lookup_table.py --verify   # cek kesamaan dengan model
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+
+import numpy as np
+
+from inference import load_predictor
+
+LUT_DIR = 'category_lut'
+
+# Grid input sesuai sidebar app.py
+UANG_SAKU_MIN = 100000
+UANG_SAKU_MAX = 5000000
+UANG_SAKU_STEP = 50000
+SPENDING_STEP = 25000
+SEMESTERS = range(1, 9)
+
+# Kode cluster untuk baris yang tidak bisa dikodekan; lookup kembali ke model
+FALLBACK_CODE = 255
+
+def model_fingerprint(predictor):
+    """Hash of the centroids, weights and labels the table was built from"""
+    digest = hashlib.sha256()
+    digest.update(np.ascontiguousarray(predictor.centers_raw).tobytes())
+    digest.update(np.ascontiguousarray(predictor.inv_scale).tobytes())
+    digest.update(json.dumps(predictor.labels).encode())
+    return digest.hexdigest()
+
+def _grid_sizes():
+    """Allowance values and number of spending steps per allowance"""
+    uang_saku = np.arange(UANG_SAKU_MIN, UANG_SAKU_MAX + 1, UANG_SAKU_STEP)
+    return uang_saku, uang_saku // SPENDING_STEP + 1
+
+def _feature_rows(a, s, m_idx, t_idx, h_idx):
+    """Raw feature rows exactly as app.predict_spending_category builds them"""
+    m = m_idx * float(SPENDING_STEP)
+    t = t_idx * float(SPENDING_STEP)
+    h = h_idx * float(SPENDING_STEP)
+    total = m + t + h
+    return np.column_stack([np.full_like(m, a), m, t, h, total / a, s])
+
+def _encode_block(predictor, a, n):
+    """Breaks and segment codes for every (semester, makanan, transport) row of one allowance"""
+    centers = predictor.centers_raw
+    w2 = predictor.inv_scale ** 2
+    n_clusters = len(centers)
+
+    s, m_idx, t_idx = [g.ravel() for g in np.meshgrid(
+        np.array(SEMESTERS, dtype=np.float64), np.arange(n), np.arange(n), indexing='ij')]
+    m = m_idx * float(SPENDING_STEP)
+    t = t_idx * float(SPENDING_STEP)
+    u = (m + t) / a
+
+    # d_k(h) = alpha_k + beta_k * h + (suku h^2 yang sama untuk semua k)
+    alpha = (w2[0] * (a - centers[:, 0]) ** 2 + w2[3] * centers[:, 3] ** 2
+             + w2[1] * (m[:, None] - centers[:, 1]) ** 2
+             + w2[2] * (t[:, None] - centers[:, 2]) ** 2
+             + w2[4] * (u[:, None] - centers[:, 4]) ** 2
+             + w2[5] * (s[:, None] - centers[:, 5]) ** 2)
+    beta = (-2 * w2[3] * centers[:, 3] + 2 * w2[4] * (u[:, None] - centers[:, 4]) / a) * SPENDING_STEP
+
+    # Lower envelope garis-garis tersebut pada indeks hiburan 0..n-1
+    rows = np.arange(len(s))
+    current = alpha.argmin(axis=1)
+    position = np.zeros(len(s))
+    codes = np.full((len(s), n_clusters), FALLBACK_CODE, dtype=np.uint8)
+    breaks = np.full((len(s), n_clusters - 1), n, dtype=np.int64)
+    codes[:, 0] = current
+    for step in range(n_clusters - 1):
+        beta_cur = beta[rows, current][:, None]
+        alpha_cur = alpha[rows, current][:, None]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            crossing = (alpha - alpha_cur) / (beta_cur - beta)
+        crossing[beta >= beta_cur] = np.inf
+        crossing = np.maximum(crossing, position[:, None])
+        nxt = crossing.argmin(axis=1)
+        at = np.ceil(crossing[rows, nxt])
+        active = at < n
+        breaks[active, step] = at[active]
+        codes[active, step + 1] = nxt[active]
+        codes[~active, step + 1] = codes[~active, step]
+        position = np.where(active, at, position)
+        current = np.where(active, nxt, current)
+
+    # Koreksi pembulatan: geser titik pergantian sampai cocok dengan predictor
+    for _ in range(3):
+        changed = False
+        for step in range(n_clusters - 1):
+            b = breaks[:, step]
+            active = np.flatnonzero(b < n)
+            if len(active) == 0:
+                continue
+            at_break = predictor.predict(_feature_rows(a, s[active], m_idx[active], t_idx[active], b[active]))
+            before = predictor.predict(_feature_rows(a, s[active], m_idx[active], t_idx[active],
+                                                     np.maximum(b[active] - 1, 0)))
+            later = at_break == codes[active, step]
+            earlier = (before == codes[active, step + 1]) & (b[active] > 0) & ~later
+            breaks[active[later], step] += 1
+            breaks[active[earlier], step] -= 1
+            changed = changed or later.any() or earlier.any()
+        if not changed:
+            break
+    breaks = np.maximum.accumulate(np.minimum(breaks, n), axis=1)
+
+    # Cek ujung baris dan sel di sekitar setiap pergantian; baris yang masih beda ke model
+    probes = [np.zeros(len(s), dtype=np.int64), np.full(len(s), n - 1)]
+    for step in range(n_clusters - 1):
+        probes += [np.clip(breaks[:, step] - 1, 0, n - 1), np.clip(breaks[:, step], 0, n - 1)]
+    mismatch = np.zeros(len(s), dtype=bool)
+    for h_idx in probes:
+        decoded = codes[rows, (breaks <= h_idx[:, None]).sum(axis=1)]
+        mismatch |= decoded != predictor.predict(_feature_rows(a, s, m_idx, t_idx, h_idx))
+    codes[mismatch] = FALLBACK_CODE
+    return s, m_idx, t_idx, breaks, codes
+
+def build_lookup_table(predictor, output_dir=LUT_DIR):
+    """Build the run-encoded table for the whole sidebar grid and save it as .npy files"""
+    os.makedirs(output_dir, exist_ok=True)
+    uang_saku, n_steps = _grid_sizes()
+    n_clusters = len(predictor.centers_raw)
+    break_dtype = np.uint8 if n_steps.max() < 255 else np.uint16
+
+    rows_per_allowance = len(SEMESTERS) * n_steps ** 2
+    row_offsets = np.concatenate([[0], np.cumsum(rows_per_allowance)]).astype(np.int64)
+    breaks_all = np.lib.format.open_memmap(os.path.join(output_dir, 'breaks.npy'), mode='w+',
+                                           dtype=break_dtype, shape=(int(row_offsets[-1]), n_clusters - 1))
+    codes_all = np.lib.format.open_memmap(os.path.join(output_dir, 'codes.npy'), mode='w+',
+                                          dtype=np.uint8, shape=(int(row_offsets[-1]), n_clusters))
+
+    for a_idx, (a, n) in enumerate(zip(uang_saku, n_steps)):
+        _, _, _, breaks, codes = _encode_block(predictor, float(a), int(n))
+        block = slice(row_offsets[a_idx], row_offsets[a_idx + 1])
+        breaks_all[block] = breaks
+        codes_all[block] = codes
+    breaks_all.flush()
+    codes_all.flush()
+
+    np.save(os.path.join(output_dir, 'row_offsets.npy'), row_offsets)
+    meta = {
+        'uang_saku_min': UANG_SAKU_MIN,
+        'uang_saku_max': UANG_SAKU_MAX,
+        'uang_saku_step': UANG_SAKU_STEP,
+        'spending_step': SPENDING_STEP,
+        'semesters': [SEMESTERS.start, SEMESTERS.stop - 1],
+        'labels': predictor.labels,
+        'model_fingerprint': model_fingerprint(predictor),
+        'n_cells': int((len(SEMESTERS) * n_steps.astype(np.int64) ** 3).sum())
+    }
+    with open(os.path.join(output_dir, 'meta.json'), 'w') as f:
+        json.dump(meta, f, indent=2)
+    return CategoryLookupTable(output_dir)
+
+class CategoryLookupTable:
+    """Memory-mapped O(1) category lookup for on-grid sidebar inputs"""
+
+    def __init__(self, lut_dir=LUT_DIR):
+        with open(os.path.join(lut_dir, 'meta.json')) as f:
+            self.meta = json.load(f)
+        self.labels = self.meta['labels']
+        self.row_offsets = np.load(os.path.join(lut_dir, 'row_offsets.npy'))
+        self.breaks = np.load(os.path.join(lut_dir, 'breaks.npy'), mmap_mode='r')
+        self.codes = np.load(os.path.join(lut_dir, 'codes.npy'), mmap_mode='r')
+        self.lut_dir = lut_dir
+
+    def lookup(self, uang_saku, makanan, transport, hiburan, semester):
+        """Cluster id for an on-grid input, or None when the model must be used"""
+        meta = self.meta
+        step = meta['spending_step']
+        if (uang_saku < meta['uang_saku_min'] or uang_saku > meta['uang_saku_max']
+                or uang_saku % meta['uang_saku_step'] or not meta['semesters'][0] <= semester <= meta['semesters'][1]):
+            return None
+        if any(v < 0 or v > uang_saku or v % step for v in (makanan, transport, hiburan)):
+            return None
+
+        n = int(uang_saku // step) + 1
+        a_idx = int((uang_saku - meta['uang_saku_min']) // meta['uang_saku_step'])
+        row = (self.row_offsets[a_idx]
+               + ((int(semester) - meta['semesters'][0]) * n + int(makanan // step)) * n
+               + int(transport // step))
+        segment = int(np.count_nonzero(self.breaks[row] <= hiburan // step))
+        code = int(self.codes[row, segment])
+        return None if code == FALLBACK_CODE else code
+
+    def size_report(self):
+        """On-disk size of the table versus a dense one-byte-per-cell table"""
+        n_cells = self.meta['n_cells']
+        files = ['breaks.npy', 'codes.npy', 'row_offsets.npy', 'meta.json']
+        encoded = sum(os.path.getsize(os.path.join(self.lut_dir, f)) for f in files)
+        return {
+            'cells': n_cells,
+            'rows': len(self.codes),
+            'dense_uint8_bytes': n_cells,
+            'dense_2bit_bytes': n_cells // 4,
+            'encoded_bytes': encoded,
+            'compression_vs_uint8': n_cells / encoded,
+            'fallback_rows': int((np.asarray(self.codes[:, 0]) == FALLBACK_CODE).sum())
+        }
+
+def verify_lookup_table(lut, predictor, n_samples=1_000_000, random_state=42):
+    """Compare table answers with the predictor on random on-grid inputs.
+
+    Returns ``(agreement, fallback_rate)``: the share of inputs answered by
+    the table that match the predictor (NaN if none were answered), and the
+    share of inputs left to the model fallback.
+    """
+    rng = np.random.default_rng(random_state)
+    uang_saku, n_steps = _grid_sizes()
+    a_idx = rng.integers(0, len(uang_saku), n_samples)
+    n = n_steps[a_idx]
+    semester = rng.integers(SEMESTERS.start, SEMESTERS.stop, n_samples)
+    m_idx, t_idx, h_idx = (rng.integers(0, n) for _ in range(3))
+
+    expected = np.empty(n_samples, dtype=np.int64)
+    for a in np.unique(a_idx):
+        mask = a_idx == a
+        expected[mask] = predictor.predict(_feature_rows(
+            float(uang_saku[a]), semester[mask].astype(np.float64), m_idx[mask], t_idx[mask], h_idx[mask]))
+
+    matches = fallbacks = 0
+    for i in range(n_samples):
+        code = lut.lookup(int(uang_saku[a_idx[i]]), int(m_idx[i]) * SPENDING_STEP,
+                          int(t_idx[i]) * SPENDING_STEP, int(h_idx[i]) * SPENDING_STEP, int(semester[i]))
+        if code is None:
+            # Dijawab model, bukan tabel: tidak dihitung sebagai cocok
+            fallbacks += 1
+        else:
+            matches += code == expected[i]
+    answered = n_samples - fallbacks
+    return (matches / answered if answered else float('nan')), fallbacks / n_samples
+
+def load_lookup_table(predictor, lut_dir=LUT_DIR):
+    """Load the table if it was built from this predictor's model, otherwise return None"""
+    if not os.path.exists(os.path.join(lut_dir, 'meta.json')):
+        return None
+    lut = CategoryLookupTable(lut_dir)
+    if lut.meta.get('model_fingerprint') != model_fingerprint(predictor):
+        # Tabel dari model lama, jangan dipakai
+        return None
+    return lut
+
+def print_size_report(lut):
+    report = lut.size_report()
+    print(f"Jumlah sel grid        : {report['cells']:,}")
+    print(f"Baris run-encoded      : {report['rows']:,}")
+    print(f"Dense uint8            : {report['dense_uint8_bytes'] / 1e6:,.1f} MB")
+    print(f"Dense 2-bit            : {report['dense_2bit_bytes'] / 1e6:,.1f} MB")
+    print(f"Run-encoded (di disk)  : {report['encoded_bytes'] / 1e6:,.1f} MB "
+          f"({report['compression_vs_uint8']:.1f}x lebih kecil dari dense uint8)")
+    print(f"Baris fallback ke model: {report['fallback_rows']:,}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Tabel lookup kategori untuk grid input app.py")
+    parser.add_argument('--build', action='store_true', help="Bangun tabel dari model yang sudah dilatih")
+    parser.add_argument('--verify', action='store_true', help="Cek kesamaan tabel dengan model")
+    parser.add_argument('--samples', type=int, default=200_000, help="Jumlah input acak untuk --verify")
+    args = parser.parse_args()
+
+    predictor = load_predictor()
+    if args.build:
+        start = time.perf_counter()
+        lut = build_lookup_table(predictor)
+        print(f"Tabel lookup dibangun dalam {time.perf_counter() - start:.1f} s")
+    else:
+        lut = CategoryLookupTable()
+
+    print_size_report(lut)
+
+    if args.verify:
+        agreement, fallback_rate = verify_lookup_table(lut, predictor, args.samples)
+        print(f"Kesamaan dengan model  : {agreement:.4%} dari input yang dijawab tabel "
+              f"({args.samples:,} input acak)")
+        print(f"Input fallback ke model: {fallback_rate:.4%}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Indeks tetangga terdekat untuk "mahasiswa yang mirip dengan Anda" di app.py.
+
+KD-tree dibangun saat training di atas fitur ter-scale dataset hasil clustering
+dan disimpan ke peer_index.pkl di sebelah kmeans_model.pkl, bersama pengeluaran
+dan kategori setiap mahasiswa (tipe ringkas). Query k tetangga hanya menyentuh
+O(log n) node, sehingga latency tetap datar walaupun dataset jutaan baris.
+Indeks ditandai dengan fingerprint model; indeks dari model lama tidak dipakai.
+
+Pemakaian:
+    python peer_index.py --build                          # setelah update_model.py
+    python peer_index.py --benchmark --sizes 10000,100000,1000000
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from inference import features_for_clustering
+
+PEER_INDEX_PATH = 'peer_index.pkl'
+DEFAULT_K = 5
+
+# Kolom yang ditampilkan untuk setiap tetangga
+PEER_COLUMNS = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan', 'semester']
+
+class PeerIndex:
+    """KD-tree over scaled features plus the compact columns shown for each peer"""
+
+    def __init__(self, tree, mean, scale, peers, kategori_codes, categories, model_fingerprint=None):
+        self.tree = tree
+        self.mean = np.asarray(mean, dtype=np.float64)
+        self.scale = np.asarray(scale, dtype=np.float64)
+        self.peers = peers
+        self.kategori_codes = kategori_codes
+        self.categories = list(categories)
+        self.model_fingerprint = model_fingerprint
+
+    @classmethod
+    def load(cls, path=PEER_INDEX_PATH):
+        import joblib
+        return cls(**joblib.load(path))
+
+    def save(self, path=PEER_INDEX_PATH):
+        # Disimpan sebagai dict biasa, agar file tidak terikat ke modul yang membuatnya
+        import joblib
+        joblib.dump(vars(self), path)
+
+    def __len__(self):
+        return len(self.kategori_codes)
+
+    def query(self, uang_saku, makanan, transport, hiburan, semester, k=DEFAULT_K):
+        """The ``k`` students closest to one input, nearest first, as a list of dicts"""
+        total = makanan + transport + hiburan
+        rasio = total / uang_saku if uang_saku > 0 else 0
+        x = (np.array([[uang_saku, makanan, transport, hiburan, rasio, semester]]) - self.mean) / self.scale
+        distances, rows = self.tree.query(x, k=min(k, len(self)))
+        return [
+            {
+                **{column: int(self.peers[column][row]) for column in PEER_COLUMNS},
+                'kategori_pengeluaran': self.categories[self.kategori_codes[row]],
+                'jarak': float(distance)
+            }
+            for distance, row in zip(distances[0], rows[0])
+        ]
+
+def build_peer_index(X_scaled, df, scaler, predictor=None, path=PEER_INDEX_PATH, leaf_size=40):
+    """Build the index from the scaled matrix and clustered frame of a training run and save it.
+
+    ``predictor`` is the model the clusters came from; its fingerprint is
+    stored so that an index from an older model is not used. With
+    ``path=None`` the index is only built, not saved.
+    """
+    from sklearn.neighbors import KDTree
+
+    from lookup_table import model_fingerprint
+
+    kategori = df['kategori_pengeluaran'].astype('category')
+    peers = {
+        column: df[column].to_numpy(dtype=np.int8 if column == 'semester' else np.int32)
+        for column in PEER_COLUMNS
+    }
+    index = PeerIndex(KDTree(np.asarray(X_scaled, dtype=np.float64), leaf_size=leaf_size),
+                      scaler.mean_, scaler.scale_, peers, kategori.cat.codes.to_numpy(dtype=np.int8),
+                      kategori.cat.categories, model_fingerprint(predictor) if predictor is not None else None)
+    if path is not None:
+        index.save(path)
+    return index
+
+def load_peer_index(predictor, path=PEER_INDEX_PATH):
+    """Load the index if it was built from this predictor's model, otherwise return None"""
+    if not os.path.exists(path):
+        return None
+    from lookup_table import model_fingerprint
+
+    index = PeerIndex.load(path)
+    if index.model_fingerprint != model_fingerprint(predictor):
+        # Indeks dari model lama, jangan dipakai
+        return None
+    return index
+
+def build_from_artifacts(data_path='student_spending_clustered.npz', path=PEER_INDEX_PATH):
+    """Rebuild the index from a saved dataset with the current model and scaler.
+
+    Categories are predicted again, so the index also matches a model that
+    update_model.py changed after training.
+    """
+    import joblib
+    from inference import load_predictor
+    from storage import read_dataset
+
+    df = read_dataset(data_path, features_for_clustering)
+    predictor = load_predictor()
+    df['kategori_pengeluaran'] = predictor.predict_category(df[features_for_clustering].to_numpy())
+    scaler = joblib.load('scaler.pkl')
+    X_scaled = scaler.transform(df[features_for_clustering])
+    return build_peer_index(X_scaled, df, scaler, predictor, path)
+
+def _query_latency(index, queries):
+    """Median and 99th percentile seconds of single-input queries"""
+    timings = []
+    for query in queries:
+        start = time.perf_counter()
+        index.query(*query)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), float(np.percentile(timings, 99))
+
+def _random_queries(n, seed=0):
+    rng = np.random.default_rng(seed)
+    uang_saku = rng.integers(2, 101, n) * 50000
+    spending = np.minimum(rng.integers(0, 41, (n, 3)) * 25000, uang_saku[:, None])
+    semester = rng.integers(1, 9, n)
+    return [(int(a), int(m), int(t), int(h), int(s)) for a, (m, t, h), s in zip(uang_saku, spending, semester)]
+
+def run_benchmark(sizes, n_queries=1000):
+    """Build and query time of the index for synthetic datasets of each size"""
+    from sklearn.preprocessing import StandardScaler
+
+    from generate_data import add_derived_columns, generate_student_spending_batch
+
+    queries = _random_queries(n_queries)
+    print("=== BENCHMARK PEER INDEX ===")
+    print(f"{'baris':>11} {'build (s)':>10} {'file (MB)':>10} {'load (s)':>9} "
+          f"{'query p50 (ms)':>15} {'query p99 (ms)':>15}")
+    for n in sizes:
+        df = add_derived_columns(generate_student_spending_batch(n, seed=42))
+        df['kategori_pengeluaran'] = np.where(df['rasio_pengeluaran'] < 0.7, 'Hemat', 'Boros')
+        scaler = StandardScaler().fit(df[features_for_clustering])
+        X_scaled = scaler.transform(df[features_for_clustering])
+
+        path = f'{PEER_INDEX_PATH}.benchmark'
+        start = time.perf_counter()
+        build_peer_index(X_scaled, df, scaler, path=path)
+        build_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = PeerIndex.load(path)
+        load_seconds = time.perf_counter() - start
+        p50, p99 = _query_latency(index, queries)
+        print(f"{n:>11,} {build_seconds:>10.2f} {os.path.getsize(path) / 1e6:>10.1f} {load_seconds:>9.3f} "
+              f"{p50 * 1e3:>15.3f} {p99 * 1e3:>15.3f}")
+        os.remove(path)
+
+def main():
+    parser = argparse.ArgumentParser(description="Indeks mahasiswa mirip (KD-tree) untuk app.py")
+    parser.add_argument('--build', action='store_true', help="Bangun ulang dari --input dengan model dan scaler.pkl saat ini")
+    parser.add_argument('--input', default='student_spending_clustered.npz', help="Tabel .npz, file CSV atau manifest.json shard mahasiswa")
+    parser.add_argument('--benchmark', action='store_true', help="Ukur waktu build dan query untuk beberapa ukuran data")
+    parser.add_argument('--sizes', default='10000,100000,1000000', help="Ukuran dataset benchmark, dipisah koma")
+    args = parser.parse_args()
+
+    if args.build:
+        start = time.perf_counter()
+        index = build_from_artifacts(args.input)
+        print(f"Peer index ({len(index):,} mahasiswa) disimpan ke {PEER_INDEX_PATH} "
+              f"dalam {time.perf_counter() - start:.2f} s ({os.path.getsize(PEER_INDEX_PATH) / 1e6:.1f} MB)")
+    if args.benchmark:
+        run_benchmark([int(size) for size in args.sizes.split(',')])
+
+if __name__ == "__main__":
+    main()
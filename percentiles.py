@@ -0,0 +1,146 @@
+"""
+Peringkat persentil mahasiswa di dalam kategorinya, dari tabel kuantil yang dihitung saat training.
+
+Untuk setiap kategori dan kolom (makanan, transport, hiburan, rasio) training
+menyimpan 101 kuantil (persentil 0-100) di cluster_summary.json, sekitar 1.200
+angka untuk semua kategori. app.py menghitung peringkat dengan binary search
+(bisect) pada tabel itu dan interpolasi linear di dalam satu persentil, tanpa
+memindai data mahasiswa. Pada mode minibatch kuantil dihitung dari sampel
+acak seragam per kategori yang bisa digabung antar chunk.
+
+Pemakaian:
+    python percentiles.py                                  # akurasi dan latency vs ECDF eksak
+    python percentiles.py --input student_spending_clustered.npz
+"""
+
+import argparse
+import bisect
+import json
+import time
+
+import numpy as np
+
+PERCENTILE_COLUMNS = ['pengeluaran_makanan', 'pengeluaran_transport', 'pengeluaran_hiburan', 'rasio_pengeluaran']
+N_QUANTILES = 101
+SAMPLE_SIZE = 100_000
+
+def quantile_table(values):
+    """Percentiles 0, 1, ..., 100 of ``values`` as a list of floats"""
+    return [round(float(q), 6) for q in np.quantile(values, np.linspace(0, 1, N_QUANTILES))]
+
+def category_quantiles(df, columns=PERCENTILE_COLUMNS):
+    """``{kategori: {column: quantile table}}`` of a clustered frame"""
+    return {
+        kategori: {column: quantile_table(group[column]) for column in columns}
+        for kategori, group in df.groupby('kategori_pengeluaran')
+    }
+
+class CategorySample:
+    """Uniform random sample of at most ``max_rows`` rows per category, built chunk by chunk.
+
+    Every row gets a random key and the rows with the smallest keys are
+    kept (bottom-k sampling), so the sample is uniform whatever the chunk
+    sizes and samples of disjoint chunks can be merged.
+    """
+
+    def __init__(self, columns=PERCENTILE_COLUMNS, max_rows=SAMPLE_SIZE, seed=42):
+        self.columns = columns
+        self.max_rows = max_rows
+        self.rng = np.random.default_rng(seed)
+        self.samples = {}
+
+    def update(self, chunk):
+        values = chunk[self.columns].to_numpy(dtype=np.float64)
+        for kategori, rows in chunk.groupby('kategori_pengeluaran').indices.items():
+            self._add(kategori, self.rng.random(len(rows)), values[rows])
+        return self
+
+    def merge(self, other):
+        for kategori, (keys, values) in other.samples.items():
+            self._add(kategori, keys, values)
+        return self
+
+    def _add(self, kategori, keys, values):
+        if kategori in self.samples:
+            old_keys, old_values = self.samples[kategori]
+            keys = np.concatenate([old_keys, keys])
+            values = np.concatenate([old_values, values])
+        if len(keys) > self.max_rows:
+            keep = np.argpartition(keys, self.max_rows)[:self.max_rows]
+            keys, values = keys[keep], values[keep]
+        self.samples[kategori] = (keys, values)
+
+    def quantiles(self):
+        return {
+            kategori: {column: quantile_table(values[:, i]) for i, column in enumerate(self.columns)}
+            for kategori, (_, values) in self.samples.items()
+        }
+
+def percentile_rank(table, value):
+    """Share (0-100) of the category at or below ``value``, by binary search in a quantile table"""
+    i = bisect.bisect_right(table, value)
+    if i == 0:
+        return 0.0
+    if i == len(table):
+        return 100.0
+    # table[i - 1] <= value < table[i]: interpolasi linear di dalam satu langkah persentil
+    step = 100 / (len(table) - 1)
+    return step * (i - 1 + (value - table[i - 1]) / (table[i] - table[i - 1]))
+
+def percentile_ranks(summary, kategori, values):
+    """Percentile rank per column of ``values`` within ``kategori``, or None if the summary has no tables"""
+    quantiles = summary['categories'].get(kategori, {}).get('quantiles')
+    if quantiles is None:
+        return None
+    return {column: percentile_rank(quantiles[column], value) for column, value in values.items()}
+
+def evaluate(df, quantiles, n_queries=2000, seed=0):
+    """Largest error in percentile points against the exact ECDF, and seconds per query of both methods"""
+    rng = np.random.default_rng(seed)
+    errors = []
+    table_seconds = scan_seconds = 0.0
+    groups = {kategori: group for kategori, group in df.groupby('kategori_pengeluaran')}
+    for _ in range(n_queries):
+        kategori = rng.choice(sorted(groups))
+        column = rng.choice(PERCENTILE_COLUMNS)
+        values = groups[kategori][column].to_numpy()
+        value = values[rng.integers(len(values))]
+
+        start = time.perf_counter()
+        rank = percentile_rank(quantiles[kategori][column], value)
+        table_seconds += time.perf_counter() - start
+
+        # Cara lama: pindai semua baris kategori
+        start = time.perf_counter()
+        exact = 100 * (values <= value).mean()
+        scan_seconds += time.perf_counter() - start
+        errors.append(abs(rank - exact))
+    return max(errors), table_seconds / n_queries, scan_seconds / n_queries
+
+def main():
+    parser = argparse.ArgumentParser(description="Cek tabel kuantil persentil per kategori")
+    parser.add_argument('--input', default='student_spending_clustered.npz', help="Dataset hasil clustering")
+    parser.add_argument('--summary', default='cluster_summary.json', help="Ringkasan cluster dengan tabel kuantil")
+    args = parser.parse_args()
+
+    from storage import read_dataset
+
+    with open(args.summary) as f:
+        summary = json.load(f)
+    quantiles = {kategori: details['quantiles'] for kategori, details in summary['categories'].items()
+                 if 'quantiles' in details}
+    if not quantiles:
+        print(f"{args.summary} belum berisi tabel kuantil; jalankan ulang kmeans_analysis.py")
+        return
+
+    df = read_dataset(args.input, PERCENTILE_COLUMNS + ['kategori_pengeluaran'])
+    n_values = sum(len(table) for tables in quantiles.values() for table in tables.values())
+    max_error, table_seconds, scan_seconds = evaluate(df, quantiles)
+    print(f"=== TABEL PERSENTIL ({len(df):,} baris, {len(quantiles)} kategori) ===")
+    print(f"Ukuran tabel        : {n_values:,} angka ({len(json.dumps(quantiles)) / 1e3:.1f} KB JSON)")
+    print(f"Error maks vs ECDF  : {max_error:.2f} poin persentil")
+    print(f"Binary search tabel : {table_seconds * 1e6:,.1f} us per query")
+    print(f"Scan semua baris    : {scan_seconds * 1e6:,.1f} us per query")
+
+if __name__ == "__main__":
+    main()
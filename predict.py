@@ -0,0 +1,118 @@
+"""
+Prediksi kategori pengeluaran secara batch untuk banyak mahasiswa sekaligus.
+
+Pemakaian:
+    python predict.py data_mahasiswa.csv --output hasil_prediksi.csv
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from inference import features_for_clustering, load_predictor
+from storage import iter_dataset_chunks
+
+# Kolom input mentah, urutan fitur training ada di features_for_clustering
+INPUT_COLUMNS = ['uang_saku', 'pengeluaran_makanan', 'pengeluaran_transport',
+                 'pengeluaran_hiburan', 'semester']
+
+def build_feature_matrix(data):
+    """Derive total and ratio columns and return the (n, 6) feature matrix.
+
+    ``data`` is a DataFrame with ``INPUT_COLUMNS`` or an array of shape
+    (n, 5) in that column order. Returns ``(X, total_pengeluaran, rasio_pengeluaran)``.
+    """
+    if isinstance(data, pd.DataFrame):
+        raw = data[INPUT_COLUMNS].to_numpy(dtype=np.float64)
+    else:
+        raw = np.asarray(data, dtype=np.float64).reshape(-1, len(INPUT_COLUMNS))
+
+    uang_saku = raw[:, 0]
+    total_pengeluaran = raw[:, 1] + raw[:, 2] + raw[:, 3]
+    rasio_pengeluaran = np.divide(total_pengeluaran, uang_saku,
+                                  out=np.zeros_like(total_pengeluaran), where=uang_saku > 0)
+
+    X = np.empty((len(raw), len(features_for_clustering)))
+    X[:, :4] = raw[:, :4]
+    X[:, 4] = rasio_pengeluaran
+    X[:, 5] = raw[:, 4]
+    return X, total_pengeluaran, rasio_pengeluaran
+
+def predict_batch(data, predictor):
+    """Score many students in one call.
+
+    Returns a DataFrame with ``total_pengeluaran``, ``rasio_pengeluaran``,
+    ``cluster``, ``kategori_pengeluaran``, ``jarak_centroid`` (distance to
+    the assigned centroid, in scaled units) and ``jarak_cluster_<i>`` for
+    every centroid. ``predictor`` is an ``inference.NearestCentroidPredictor``.
+    """
+    X, total_pengeluaran, rasio_pengeluaran = build_feature_matrix(data)
+    distances = predictor.distances(X)
+    clusters = distances.argmin(axis=1)
+    result = pd.DataFrame({
+        'total_pengeluaran': total_pengeluaran,
+        'rasio_pengeluaran': rasio_pengeluaran,
+        'cluster': clusters,
+        'kategori_pengeluaran': pd.Categorical.from_codes(clusters, categories=predictor.labels),
+        'jarak_centroid': distances[np.arange(len(clusters)), clusters]
+    })
+    for i in range(distances.shape[1]):
+        result[f'jarak_cluster_{i}'] = distances[:, i]
+    if isinstance(data, pd.DataFrame):
+        result.index = data.index
+    return result
+
+def score_csv(input_path, output_path=None, chunk_size=1_000_000):
+    """Score a CSV file or .npz table chunk by chunk; returns (category counts, timings)"""
+    predictor = load_predictor()
+
+    if output_path and os.path.exists(output_path):
+        os.remove(output_path)
+
+    counts = pd.Series(dtype=np.int64)
+    timings = {'rows': 0, 'read': 0.0, 'predict': 0.0, 'write': 0.0}
+    reader = iter_dataset_chunks(input_path, chunk_size, INPUT_COLUMNS)
+    while True:
+        start = time.perf_counter()
+        chunk = next(reader, None)
+        timings['read'] += time.perf_counter() - start
+        if chunk is None:
+            break
+
+        start = time.perf_counter()
+        result = predict_batch(chunk, predictor)
+        timings['predict'] += time.perf_counter() - start
+        timings['rows'] += len(chunk)
+        counts = counts.add(result['kategori_pengeluaran'].value_counts(), fill_value=0)
+
+        if output_path:
+            start = time.perf_counter()
+            pd.concat([chunk, result], axis=1).to_csv(
+                output_path, mode='a', header=not os.path.exists(output_path), index=False)
+            timings['write'] += time.perf_counter() - start
+
+    return counts.astype(np.int64), timings
+
+def main():
+    parser = argparse.ArgumentParser(description="Prediksi kategori pengeluaran untuk file CSV atau tabel .npz")
+    parser.add_argument('input', help=f"CSV atau tabel .npz dengan kolom: {', '.join(INPUT_COLUMNS)}")
+    parser.add_argument('--output', help="CSV hasil prediksi (opsional)")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="Jumlah baris per chunk")
+    args = parser.parse_args()
+
+    counts, timings = score_csv(args.input, args.output, args.chunk_size)
+    total_seconds = timings['read'] + timings['predict'] + timings['write']
+
+    print(f"Total diprediksi: {timings['rows']:,} mahasiswa")
+    print(counts.to_string())
+    print(f"\nBaca CSV : {timings['read']:.3f} s")
+    print(f"Prediksi : {timings['predict']:.3f} s ({timings['rows'] / max(timings['predict'], 1e-9):,.0f} baris/s)")
+    if args.output:
+        print(f"Tulis CSV: {timings['write']:.3f} s")
+    print(f"Total    : {total_seconds:.3f} s ({timings['rows'] / max(total_seconds, 1e-9):,.0f} baris/s)")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
 import sys
-import pandas as pd
 import numpy as np
 
 # Pastikan output terminal menggunakan UTF-8 (agar emoji tidak error di Windows)
@@ -9,7 +8,25 @@ except AttributeError:
     # Untuk Python < 3.7, gunakan cara lain atau abaikan
     pass
 
+def parse_percentage(percentage):
+    """Parse '35-40%' or '20%' into (min, max, average) fractions"""
+    if '-' in percentage:
+        min_pct, max_pct = percentage.replace('%', '').split('-')
+        min_pct, max_pct = float(min_pct), float(max_pct)
+        avg_pct = (min_pct + max_pct) / 2 / 100
+    else:
+        min_pct = max_pct = float(percentage.replace('%', ''))
+        avg_pct = min_pct / 100
+    return min_pct / 100, max_pct / 100, avg_pct
+
 class SpendingRecommendationSystem:
+    # Batas rasio per kategori pengeluaran untuk tips personal
+    personal_tip_thresholds = {
+        'makanan': 0.5,
+        'transport': 0.3,
+        'hiburan': 0.2
+    }
+
     def __init__(self):
         self.tips_database = {
             'Hemat': {
@@ -84,6 +101,18 @@ class SpendingRecommendationSystem:
                 'tabungan': '5-10%'
             }
         }
+
+        # Parse rentang persentase sekali saja, dipakai ulang di setiap panggilan
+        self.budget_ratios = {
+            kategori: {category: parse_percentage(percentage) for category, percentage in guide.items()}
+            for kategori, guide in self.budget_suggestions.items()
+        }
+        self.kategori_names = list(self.budget_suggestions)
+        self.budget_items = list(next(iter(self.budget_suggestions.values())))
+        self.budget_avg_matrix = np.array([
+            [self.budget_ratios[kategori][item][2] for item in self.budget_items]
+            for kategori in self.kategori_names
+        ])
     
     def get_recommendations(self, kategori, uang_saku, pengeluaran_data):
         """Generate personalized recommendations"""
@@ -103,13 +132,13 @@ class SpendingRecommendationSystem:
         # Personalized tips berdasarkan pola pengeluaran
         personalized_tips = []
         
-        if makanan_ratio > 0.5:
+        if makanan_ratio > self.personal_tip_thresholds['makanan']:
             personalized_tips.append('🍽️ Pengeluaran makanan terlalu tinggi! Coba masak sendiri atau beli makanan yang lebih ekonomis')
         
-        if transport_ratio > 0.3:
+        if transport_ratio > self.personal_tip_thresholds['transport']:
             personalized_tips.append('🚌 Pengeluaran transport berlebihan. Pertimbangkan naik angkot atau jalan kaki untuk jarak dekat')
             
-        if hiburan_ratio > 0.2:
+        if hiburan_ratio > self.personal_tip_thresholds['hiburan']:
             personalized_tips.append('🎮 Pengeluaran hiburan terlalu tinggi. Cari alternatif hiburan gratis seperti olahraga atau baca buku')
         
         # Tambahkan tips personal
@@ -137,13 +166,7 @@ class SpendingRecommendationSystem:
         
         planning = {}
         for category, percentage in budget_guide.items():
-            # Parse percentage range
-            if '-' in percentage:
-                min_pct, max_pct = percentage.replace('%', '').split('-')
-                avg_pct = (float(min_pct) + float(max_pct)) / 2 / 100
-            else:
-                avg_pct = float(percentage.replace('%', '')) / 100
-                
+            avg_pct = self.budget_ratios[kategori][category][2]
             planning[category] = {
                 'percentage': percentage,
                 'amount': int(uang_saku * avg_pct)
@@ -151,6 +174,50 @@ class SpendingRecommendationSystem:
         
         return planning
 
+    def _kategori_codes(self, kategori):
+        """Map an array of category names to row indices of budget_avg_matrix"""
+        kategori = np.asarray(kategori)
+        unique, inverse = np.unique(kategori, return_inverse=True)
+        unknown = set(unique) - set(self.kategori_names)
+        if unknown:
+            raise KeyError(f"Kategori tidak dikenal: {sorted(unknown)}")
+        lookup = np.array([self.kategori_names.index(name) for name in unique])
+        return lookup[inverse]
+
+    def get_recommendations_batch(self, kategori, uang_saku, makanan, transport, hiburan):
+        """Columnar version of get_recommendations for many students.
+
+        Takes equal-length arrays and returns a dict of arrays: the financial
+        summary (``total_pengeluaran``, ``rasio_pengeluaran``, ``sisa_uang``,
+        ``surplus``), one boolean ``tip_<item>`` flag per personal tip and
+        ``kategori_code`` indexing ``kategori_names`` for the static tips.
+        """
+        uang_saku = np.asarray(uang_saku, dtype=np.float64)
+        spending = {
+            'makanan': np.asarray(makanan, dtype=np.float64),
+            'transport': np.asarray(transport, dtype=np.float64),
+            'hiburan': np.asarray(hiburan, dtype=np.float64)
+        }
+
+        total_pengeluaran = spending['makanan'] + spending['transport'] + spending['hiburan']
+        sisa_uang = uang_saku - total_pengeluaran
+        result = {
+            'kategori_code': self._kategori_codes(kategori),
+            'total_pengeluaran': total_pengeluaran,
+            'rasio_pengeluaran': total_pengeluaran / uang_saku,
+            'sisa_uang': sisa_uang,
+            'surplus': sisa_uang > 0
+        }
+        for item, threshold in self.personal_tip_thresholds.items():
+            result[f'tip_{item}'] = spending[item] / uang_saku > threshold
+        return result
+
+    def get_monthly_planning_batch(self, kategori, uang_saku):
+        """Columnar version of get_monthly_planning: one int64 amount array per budget item"""
+        ratios = self.budget_avg_matrix[self._kategori_codes(kategori)]
+        amounts = np.asarray(uang_saku, dtype=np.float64)[:, None] * ratios
+        return {item: np.trunc(amounts[:, i]).astype(np.int64) for i, item in enumerate(self.budget_items)}
+
 # Test the recommendation system
 if __name__ == "__main__":
     rec_system = SpendingRecommendationSystem()
@@ -1,33 +1,172 @@
 #!/usr/bin/env python3
 """
 Script untuk menjalankan semua proses analisis pola pengeluaran mahasiswa
+
+Setiap stage mendeklarasikan file input dan output. Hash isi file disimpan di
+.pipeline_cache.json, sehingga stage yang input dan outputnya tidak berubah dilewati.
+Gunakan --force <stage> (atau --force all) untuk tetap menjalankannya.
+
+Dependensi antar stage dideklarasikan di 'deps'; stage yang saling independen
+dijalankan bersamaan (maksimal --workers), output setiap stage ditampilkan utuh
+setelah stage selesai.
+
+Dengan --metrics <file>, setiap stage (dan span di dalam script-nya) ditulis ke
+file JSON lines tersebut dan tabel ringkasan run dicetak di akhir.
 """
 
+import argparse
+import hashlib
+import io
+import json
 import os
 import subprocess
 import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import instrumentation
+
+CACHE_PATH = '.pipeline_cache.json'
+
+# Input mencakup script itu sendiri dan modul lokal yang di-import
+STAGES = [
+    {
+        'name': 'generate_data',
+        'deps': [],
+        'script': 'generate_data.py',
+        'description': 'Generating synthetic dataset',
+        'inputs': ['generate_data.py', 'instrumentation.py', 'storage.py'],
+        'outputs': ['student_spending_data.npz', 'student_spending_data.csv']
+    },
+    {
+        'name': 'feature_store',
+        'deps': ['generate_data'],
+        'script': 'feature_store.py',
+        'description': 'Building scaled feature matrix',
+        'inputs': ['feature_store.py', 'inference.py', 'instrumentation.py', 'storage.py', 'streaming_stats.py',
+                   'student_spending_data.npz'],
+        'outputs': ['feature_store/features.npy', 'feature_store/meta.json']
+    },
+    {
+        'name': 'explore_data',
+        'deps': ['feature_store'],
+        'script': 'explore_data.py',
+        'description': 'Exploring and visualizing data',
+        'inputs': ['explore_data.py', 'fast_plots.py', 'feature_store.py', 'instrumentation.py', 'storage.py',
+                   'student_spending_data.npz', 'feature_store/meta.json'],
+        'outputs': ['data_exploration.png']
+    },
+    {
+        'name': 'kmeans_analysis',
+        'deps': ['feature_store'],
+        'script': 'kmeans_analysis.py',
+        'description': 'Running K-Means clustering analysis',
+        'inputs': ['kmeans_analysis.py', 'fast_plots.py', 'feature_store.py', 'inference.py', 'instrumentation.py',
+                   'lookup_table.py', 'peer_index.py', 'percentiles.py', 'silhouette.py', 'storage.py',
+                   'streaming_stats.py', 'student_spending_data.npz', 'feature_store/meta.json'],
+        'outputs': ['optimal_k_analysis.png', 'clustering_results.png',
+                    'student_spending_clustered.npz', 'student_spending_clustered.csv',
+                    'kmeans_model.pkl', 'scaler.pkl', 'cluster_labels.pkl',
+                    'kmeans_inference.json', 'cluster_summary.json', 'peer_index.pkl']
+    },
+    {
+        'name': 'recommendations',
+        'deps': [],
+        'script': 'recommendations.py',
+        'description': 'Testing recommendation system',
+        'inputs': ['recommendations.py'],
+        'outputs': []
+    }
+]
 
-def run_script(script_name, description):
-    """Run a Python script and handle errors"""
-    print(f"\n{'='*50}")
-    print(f"🚀 {description}")
-    print(f"{'='*50}")
+def file_hash(path, chunk_size=1 << 20):
+    """SHA-256 of a file's content, or None if it does not exist"""
+    if not os.path.exists(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+def load_cache(path=CACHE_PATH):
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return {}
+
+def save_cache(cache, path=CACHE_PATH):
+    with open(path, 'w') as f:
+        json.dump(cache, f, indent=2)
+
+def hash_files(paths):
+    return {path: file_hash(path) for path in paths}
+
+def cache_status(stage, cache):
+    """Return (is_valid, reason) for a stage against the recorded hashes"""
+    entry = cache.get(stage['name'])
+    if entry is None:
+        return False, 'belum pernah dijalankan'
+    changed = [path for path, digest in hash_files(stage['inputs']).items() if entry['inputs'].get(path) != digest]
+    if changed:
+        return False, f"input berubah: {', '.join(changed)}"
+    invalid = [path for path, digest in hash_files(stage['outputs']).items()
+               if digest is None or entry['outputs'].get(path) != digest]
+    if invalid:
+        return False, f"output hilang/berubah: {', '.join(invalid)}"
+    return True, 'input dan output tidak berubah'
+
+def record_stage(stage, cache):
+    """Store the current input and output hashes of a stage that just succeeded"""
+    cache[stage['name']] = {
+        'inputs': hash_files(stage['inputs']),
+        'outputs': hash_files(stage['outputs'])
+    }
+
+def run_stage(stage):
+    """Run one stage with its output captured; returns (success, output, seconds)"""
+    out = io.StringIO()
+    start = time.perf_counter()
+    with instrumentation.span(f"pipeline.{stage['name']}") as stage_span:
+        success = run_script(stage['script'], stage['description'], out)
+        stage_span.set(success=success)
+    return success, out.getvalue(), time.perf_counter() - start
+
+def print_cache_report(report, wall_seconds):
+    print(f"\n{'='*60}")
+    print("📋 LAPORAN CACHE PIPELINE")
+    print(f"{'='*60}")
+    for stage in STAGES:
+        if stage['name'] not in report:
+            continue
+        status, reason, seconds = report[stage['name']]
+        print(f"  {stage['name']:<18} {status:<10} {seconds:>7.1f} s  {reason}")
+    total_seconds = sum(seconds for _, _, seconds in report.values())
+    print(f"\n  Total waktu per stage : {total_seconds:.1f} s")
+    print(f"  Waktu wall-clock      : {wall_seconds:.1f} s")
+
+def run_script(script_name, description, out=None):
+    """Run a Python script and handle errors; messages go to ``out`` (default stdout)"""
+    print(f"\n{'='*50}", file=out)
+    print(f"🚀 {description}", file=out)
+    print(f"{'='*50}", file=out)
     
     try:
         result = subprocess.run([sys.executable, script_name], 
                               capture_output=True, text=True, check=True)
-        print(result.stdout)
+        print(result.stdout, file=out)
         if result.stderr:
-            print(f"Warnings: {result.stderr}")
-        print(f"✅ {description} berhasil!")
+            print(f"Warnings: {result.stderr}", file=out)
+        print(f"✅ {description} berhasil!", file=out)
         return True
     except subprocess.CalledProcessError as e:
-        print(f"❌ Error saat menjalankan {script_name}:")
-        print(f"stdout: {e.stdout}")
-        print(f"stderr: {e.stderr}")
+        print(f"❌ Error saat menjalankan {script_name}:", file=out)
+        print(f"stdout: {e.stdout}", file=out)
+        print(f"stderr: {e.stderr}", file=out)
         return False
     except FileNotFoundError:
-        print(f"❌ File {script_name} tidak ditemukan!")
+        print(f"❌ File {script_name} tidak ditemukan!", file=out)
         return False
 
 def check_requirements():
@@ -74,10 +213,19 @@ def create_file_structure():
     
     return True
 
-def main():
-    """Main execution function"""
+def main(force=(), use_cache=True, workers=os.cpu_count() or 1, metrics=None):
+    """Main execution function
+
+    ``force`` lists stage names (or ``'all'``) that run even when cached;
+    ``use_cache=False`` ignores and does not update the cache. At most
+    ``workers`` independent stages run at the same time. With ``metrics``
+    every stage writes its spans to that JSON lines file.
+    """
     print("🎯 ANALISIS POLA PENGELUARAN MAHASISWA")
     print("=" * 60)
+
+    # Aktifkan sebelum stage dijalankan, agar subprocess mewarisi environment-nya
+    run_id = instrumentation.enable(metrics) if metrics else None
     
     # Check requirements
     if not check_requirements():
@@ -86,21 +234,63 @@ def main():
     # Create file structure
     create_file_structure()
     
-    # List of scripts to run in order
-    scripts = [
-        ("generate_data.py", "Generating synthetic dataset"),
-        ("explore_data.py", "Exploring and visualizing data"),
-        ("kmeans_analysis.py", "Running K-Means clustering analysis"),
-        ("recommendations.py", "Testing recommendation system")
-    ]
-    
-    # Run each script
+    # Jalankan stage begitu semua dependensinya selesai; stage yang gagal
+    # tetap dianggap selesai agar stage lain lanjut seperti sebelumnya
+    cache = load_cache() if use_cache else {}
+    report = {}
     all_success = True
-    for script, description in scripts:
-        success = run_script(script, description)
-        if not success:
-            all_success = False
-            print(f"⚠️ Continuing despite error in {script}...")
+    pending = {stage['name']: stage for stage in STAGES}
+    done = set()
+    running = {}
+    pipeline_start = time.perf_counter()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as executor:
+        while pending or running:
+            ready = [stage for stage in pending.values() if all(dep in done for dep in stage['deps'])]
+            skipped_any = False
+            for stage in ready:
+                del pending[stage['name']]
+                forced = 'all' in force or stage['name'] in force
+                if use_cache and not forced:
+                    valid, reason = cache_status(stage, cache)
+                    if valid:
+                        print(f"\n⏭️  {stage['description']}: dilewati ({reason})")
+                        report[stage['name']] = ('CACHE', reason, 0.0)
+                        instrumentation.count('pipeline.cached_stages')
+                        done.add(stage['name'])
+                        skipped_any = True
+                        continue
+                else:
+                    reason = '--force' if forced else 'cache dimatikan'
+                running[executor.submit(run_stage, stage)] = (stage, reason)
+
+            if skipped_any:
+                continue
+            if not running:
+                raise ValueError(f"Dependensi stage tidak bisa dipenuhi: {', '.join(pending)}")
+
+            finished, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in finished:
+                stage, reason = running.pop(future)
+                success, output, seconds = future.result()
+                print(output, end='')
+                done.add(stage['name'])
+                if success:
+                    report[stage['name']] = ('RUN', reason, seconds)
+                    if use_cache:
+                        record_stage(stage, cache)
+                        save_cache(cache)
+                else:
+                    report[stage['name']] = ('GAGAL', reason, seconds)
+                    all_success = False
+                    if use_cache and cache.pop(stage['name'], None) is not None:
+                        save_cache(cache)
+                    print(f"⚠️ Continuing despite error in {stage['script']}...")
+
+    print_cache_report(report, time.perf_counter() - pipeline_start)
+    if metrics:
+        print(f"\n📈 METRICS (run {run_id}, {metrics})")
+        instrumentation.print_summary(instrumentation.read_events(metrics, run_id))
     
     print(f"\n{'='*60}")
     if all_success:
@@ -119,7 +309,18 @@ def main():
     return all_success
 
 if __name__ == "__main__":
-    success = main()
+    parser = argparse.ArgumentParser(description="Jalankan seluruh pipeline analisis pengeluaran mahasiswa")
+    parser.add_argument('--force', action='append', default=[],
+                        choices=[stage['name'] for stage in STAGES] + ['all'],
+                        help="Jalankan stage ini walaupun cache masih valid (bisa diulang)")
+    parser.add_argument('--no-cache', action='store_true', help="Abaikan cache dan jalankan semua stage")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Jumlah maksimum stage yang berjalan bersamaan")
+    parser.add_argument('--metrics', metavar='FILE',
+                        help="Tulis span dan counter setiap stage ke file JSON lines ini")
+    args = parser.parse_args()
+
+    success = main(force=args.force, use_cache=not args.no_cache, workers=args.workers, metrics=args.metrics)
     if success:
         # Ask user if they want to run the Streamlit app
         while True:
@@ -0,0 +1,357 @@
+"""
+Layanan HTTP untuk prediksi kategori pengeluaran, tanpa Streamlit.
+
+Request yang datang bersamaan dikumpulkan menjadi micro-batch lalu diprediksi
+sekaligus (vectorized) dengan predictor dari inference.py dan mode batch
+SpendingRecommendationSystem. Hanya memakai asyncio dari standard library.
+
+Endpoint:
+    POST /predict   satu objek JSON atau list objek dengan kolom predict.INPUT_COLUMNS
+    GET  /stats     latency p50/p99 dan statistik batch
+    GET  /health
+
+Pemakaian:
+    python scoring_service.py --port 8600 --max-batch-size 256 --max-wait-ms 2
+    python scoring_service.py --load-test --requests 20000 --concurrency 64
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import time
+from collections import deque
+
+import numpy as np
+
+from inference import load_predictor
+from predict import INPUT_COLUMNS, build_feature_matrix
+from recommendations import SpendingRecommendationSystem
+from storage import DATA_PATH, read_dataset
+
+MAX_BODY_BYTES = 1_000_000
+SEMESTERS = range(1, 9)
+LATENCY_WINDOW = 100_000
+
+class RequestError(ValueError):
+    """Invalid request payload, answered with HTTP 400"""
+
+def parse_record(record):
+    """Validate one JSON object and return its values in INPUT_COLUMNS order"""
+    if not isinstance(record, dict):
+        raise RequestError("setiap data harus berupa objek JSON")
+    missing = [column for column in INPUT_COLUMNS if column not in record]
+    if missing:
+        raise RequestError(f"kolom tidak ada: {', '.join(missing)}")
+    try:
+        values = [float(record[column]) for column in INPUT_COLUMNS]
+    except (TypeError, ValueError):
+        raise RequestError("semua kolom harus berupa angka") from None
+    # Aturan yang sama dengan input di app.py
+    if not all(math.isfinite(value) for value in values):
+        raise RequestError("semua kolom harus berupa angka berhingga (bukan NaN atau Infinity)")
+    uang_saku, makanan, transport, hiburan, semester = values
+    if uang_saku <= 0:
+        raise RequestError("uang_saku harus lebih dari 0")
+    if min(makanan, transport, hiburan) < 0:
+        raise RequestError("pengeluaran tidak boleh negatif")
+    if semester not in SEMESTERS:
+        raise RequestError("semester harus bilangan bulat 1-8")
+    return values
+
+def percentile(values, q):
+    """Percentile in milliseconds of a sequence of seconds, None when empty"""
+    if not values:
+        return None
+    return float(np.percentile(np.fromiter(values, dtype=np.float64), q) * 1000)
+
+class MicroBatcher:
+    """Collect concurrent requests and score them together.
+
+    A batch is scored as soon as ``max_batch_size`` records are waiting, or
+    ``max_wait_ms`` after the first record of the batch arrived.
+    ``max_batch_size=1`` scores every request on its own.
+    """
+
+    def __init__(self, predictor, rec_system, max_batch_size=256, max_wait_ms=2.0):
+        self.predictor = predictor
+        self.rec_system = rec_system
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.latencies = deque(maxlen=LATENCY_WINDOW)
+        self.n_batches = 0
+        self.n_records = 0
+        self._pending = []
+        self._has_items = asyncio.Event()
+        self._full = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+
+    async def submit(self, values):
+        """Queue one validated record and wait for its scored result"""
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((values, future))
+        self._has_items.set()
+        if len(self._pending) >= self.max_batch_size:
+            self._full.set()
+        return await future
+
+    async def _run(self):
+        while True:
+            await self._has_items.wait()
+            if len(self._pending) < self.max_batch_size and self.max_wait > 0:
+                try:
+                    await asyncio.wait_for(self._full.wait(), self.max_wait)
+                except asyncio.TimeoutError:
+                    pass
+
+            batch = self._pending[:self.max_batch_size]
+            del self._pending[:self.max_batch_size]
+            if len(self._pending) < self.max_batch_size:
+                self._full.clear()
+            if not self._pending:
+                self._has_items.clear()
+
+            try:
+                results = self.score([values for values, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+            self.n_batches += 1
+            self.n_records += len(batch)
+
+    def score(self, rows):
+        """Score a list of records (INPUT_COLUMNS order) and return one dict per record"""
+        X, _, _ = build_feature_matrix(np.array(rows, dtype=np.float64))
+        distances = self.predictor.distances(X)
+        clusters = distances.argmin(axis=1)
+        kategori = np.array(self.predictor.labels)[clusters]
+
+        rec = self.rec_system.get_recommendations_batch(kategori, X[:, 0], X[:, 1], X[:, 2], X[:, 3])
+        planning = self.rec_system.get_monthly_planning_batch(kategori, X[:, 0])
+        tip_items = list(self.rec_system.personal_tip_thresholds)
+        tip_flags = np.column_stack([rec[f'tip_{item}'] for item in tip_items])
+
+        results = []
+        for i in range(len(rows)):
+            results.append({
+                'kategori_pengeluaran': str(kategori[i]),
+                'cluster': int(clusters[i]),
+                'jarak_centroid': float(distances[i, clusters[i]]),
+                'total_pengeluaran': float(rec['total_pengeluaran'][i]),
+                'rasio_pengeluaran': float(rec['rasio_pengeluaran'][i]),
+                'sisa_uang': float(rec['sisa_uang'][i]),
+                'status_sisa': 'Surplus' if rec['surplus'][i] else 'Defisit',
+                'tips_personal': [item for item, flag in zip(tip_items, tip_flags[i]) if flag],
+                'rencana_budget': {item: int(amounts[i]) for item, amounts in planning.items()}
+            })
+        return results
+
+    def stats(self):
+        return {
+            'requests': self.n_records,
+            'batches': self.n_batches,
+            'rata_rata_batch': self.n_records / self.n_batches if self.n_batches else 0.0,
+            'p50_ms': percentile(self.latencies, 50),
+            'p99_ms': percentile(self.latencies, 99),
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000
+        }
+
+class ScoringService:
+    """Minimal HTTP/1.1 server (keep-alive, JSON only) in front of a MicroBatcher"""
+
+    def __init__(self, batcher):
+        self.batcher = batcher
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                length = int(headers.get('content-length', 0))
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': "request terlalu besar"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b''
+
+                status, payload = await self.dispatch(method, path, body)
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def dispatch(self, method, path, body):
+        if path == '/predict' and method == 'POST':
+            start = time.perf_counter()
+            try:
+                payload = json.loads(body)
+            except ValueError:
+                # JSONDecodeError, atau UnicodeDecodeError untuk body yang bukan UTF-8
+                return 400, {'error': "body bukan JSON UTF-8 yang valid"}
+            records = payload if isinstance(payload, list) else [payload]
+            try:
+                rows = [parse_record(record) for record in records]
+            except RequestError as e:
+                return 400, {'error': str(e)}
+            # Exception saat scoring di-set ke semua future di batch itu; jawab 500, jangan putus koneksi
+            results = await asyncio.gather(*(self.batcher.submit(row) for row in rows), return_exceptions=True)
+            errors = [result for result in results if isinstance(result, Exception)]
+            if errors:
+                return 500, {'error': f"gagal memproses prediksi: {type(errors[0]).__name__}"}
+            self.batcher.latencies.append(time.perf_counter() - start)
+            return 200, results if isinstance(payload, list) else results[0]
+        if path == '/stats' and method == 'GET':
+            return 200, self.batcher.stats()
+        if path == '/health' and method == 'GET':
+            return 200, {'status': 'ok'}
+        return 404, {'error': f"tidak ada endpoint {method} {path}"}
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive=True):
+        reasons = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 413: 'Payload Too Large',
+                   500: 'Internal Server Error'}
+        body = json.dumps(payload).encode()
+        head = (f"HTTP/1.1 {status} {reasons[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode() + body)
+        await writer.drain()
+
+async def start_service(host='127.0.0.1', port=8600, max_batch_size=256, max_wait_ms=2.0):
+    """Load the model, start the batcher and the server; returns (server, batcher)"""
+    batcher = MicroBatcher(load_predictor(), SpendingRecommendationSystem(), max_batch_size, max_wait_ms)
+    batcher.start()
+    service = ScoringService(batcher)
+    server = await asyncio.start_server(service.handle_connection, host, port)
+    return server, batcher
+
+async def serve(host, port, max_batch_size, max_wait_ms):
+    server, batcher = await start_service(host, port, max_batch_size, max_wait_ms)
+    print(f"Scoring service berjalan di http://{host}:{port} "
+          f"(max batch {max_batch_size}, max wait {max_wait_ms} ms)")
+    try:
+        async with server:
+            await server.serve_forever()
+    finally:
+        await batcher.stop()
+        stats = batcher.stats()
+        if stats['requests']:
+            print(f"\n{stats['requests']:,} request, p50 {stats['p50_ms']:.2f} ms, p99 {stats['p99_ms']:.2f} ms")
+
+async def _client(host, port, bodies, latencies):
+    """One keep-alive connection sending its share of requests one after another"""
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        for body in bodies:
+            start = time.perf_counter()
+            writer.write(b"POST /predict HTTP/1.1\r\nHost: localhost\r\nContent-Type: application/json\r\n"
+                         b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b'\r\n', b''):
+                    break
+                if line.lower().startswith(b'content-length:'):
+                    length = int(line.split(b':')[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - start)
+    finally:
+        writer.close()
+
+async def run_load(n_requests, concurrency, max_batch_size, max_wait_ms, data_path=DATA_PATH):
+    """Start an in-process service and hit it with ``concurrency`` clients"""
+    df = read_dataset(data_path, columns=INPUT_COLUMNS)
+    records = df.sample(n_requests, replace=True, random_state=42).to_dict('records')
+    bodies = [json.dumps(record).encode() for record in records]
+
+    server, batcher = await start_service('127.0.0.1', 0, max_batch_size, max_wait_ms)
+    port = server.sockets[0].getsockname()[1]
+    latencies = []
+    start = time.perf_counter()
+    await asyncio.gather(*(_client('127.0.0.1', port, bodies[i::concurrency], latencies)
+                           for i in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    server.close()
+    await server.wait_closed()
+    await batcher.stop()
+
+    stats = batcher.stats()
+    return {
+        'throughput': n_requests / elapsed,
+        'client_p50_ms': percentile(latencies, 50),
+        'client_p99_ms': percentile(latencies, 99),
+        'server_p50_ms': stats['p50_ms'],
+        'server_p99_ms': stats['p99_ms'],
+        'rata_rata_batch': stats['rata_rata_batch']
+    }
+
+def load_test(n_requests, concurrency, max_batch_size, max_wait_ms):
+    """Compare micro-batching with one-request-at-a-time scoring under the same load"""
+    print(f"Load test: {n_requests:,} request, {concurrency} koneksi bersamaan\n")
+    configs = [("Satu per satu", 1, 0.0), ("Micro-batch", max_batch_size, max_wait_ms)]
+    results = {}
+    for name, batch_size, wait_ms in configs:
+        results[name] = asyncio.run(run_load(n_requests, concurrency, batch_size, wait_ms))
+
+    print(f"{'Mode':<15} {'req/s':>10} {'batch':>7} {'p50 ms':>8} {'p99 ms':>8} {'server p50':>11} {'server p99':>11}")
+    for name, r in results.items():
+        print(f"{name:<15} {r['throughput']:>10,.0f} {r['rata_rata_batch']:>7.1f} {r['client_p50_ms']:>8.2f} "
+              f"{r['client_p99_ms']:>8.2f} {r['server_p50_ms']:>11.2f} {r['server_p99_ms']:>11.2f}")
+    speedup = results["Micro-batch"]['throughput'] / results["Satu per satu"]['throughput']
+    print(f"\nThroughput micro-batch: {speedup:.2f}x dibanding satu per satu")
+
+def main():
+    parser = argparse.ArgumentParser(description="Layanan HTTP prediksi kategori pengeluaran dengan micro-batching")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8600)
+    parser.add_argument('--max-batch-size', type=int, default=256, help="Jumlah request maksimum per batch")
+    parser.add_argument('--max-wait-ms', type=float, default=2.0,
+                        help="Waktu tunggu maksimum sebelum batch yang belum penuh diproses")
+    parser.add_argument('--load-test', action='store_true',
+                        help="Jalankan load generator dan bandingkan dengan prediksi satu per satu")
+    parser.add_argument('--requests', type=int, default=20_000, help="Jumlah request untuk --load-test")
+    parser.add_argument('--concurrency', type=int, default=64, help="Jumlah koneksi bersamaan untuk --load-test")
+    args = parser.parse_args()
+
+    if args.load_test:
+        load_test(args.requests, args.concurrency, args.max_batch_size, args.max_wait_ms)
+        return
+    try:
+        asyncio.run(serve(args.host, args.port, args.max_batch_size, args.max_wait_ms))
+    except KeyboardInterrupt:
+        print("\n👋 Scoring service dihentikan")
+
+if __name__ == "__main__":
+    main()
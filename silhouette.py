@@ -0,0 +1,122 @@
+"""
+Silhouette score yang tetap jalan untuk dataset besar.
+
+- Mode exact: jarak dihitung per blok sehingga memori O(block_size²), bukan O(n²).
+- Mode sampled: stratified sample per cluster, setiap titik sample dinilai terhadap
+  seluruh dataset, lalu dilaporkan beserta confidence interval.
+"""
+
+from statistics import NormalDist
+
+import numpy as np
+
+# Di atas jumlah baris ini kmeans_analysis.py memakai estimator sampled
+EXACT_MAX_ROWS = 20_000
+
+def _block(X, index):
+    # Hanya blok yang sedang dipakai dinaikkan ke float64; matriks bersama (mis. memmap float32) tidak disalin
+    return X[index].astype(np.float64, copy=False)
+
+def _cluster_distance_sums(X, codes, n_clusters, rows, block_size):
+    """Sum of distances from each row in ``rows`` to every cluster, shape (len(rows), k)"""
+    sq_norms = np.concatenate([
+        np.einsum('ij,ij->i', B, B)
+        for B in (_block(X, slice(start, start + block_size)) for start in range(0, len(X), block_size))
+    ])
+    sums = np.zeros((len(rows), n_clusters))
+
+    for row_start in range(0, len(rows), block_size):
+        query_index = rows[row_start:row_start + block_size]
+        Q = _block(X, query_index)
+        q_norms = sq_norms[query_index]
+
+        for col_start in range(0, len(X), block_size):
+            block = slice(col_start, col_start + block_size)
+            distances = q_norms[:, None] + sq_norms[None, block] - 2 * Q @ _block(X, block).T
+            np.maximum(distances, 0, out=distances)
+            np.sqrt(distances, out=distances)
+            one_hot = np.zeros((distances.shape[1], n_clusters))
+            one_hot[np.arange(distances.shape[1]), codes[block]] = 1
+            sums[row_start:row_start + len(query_index)] += distances @ one_hot
+
+    return sums
+
+def silhouette_values(X, labels, rows=None, block_size=2048):
+    """Per-row silhouette for ``rows`` (default all rows) against the full dataset.
+
+    ``X`` is read block by block and each block is upcast to float64, so a
+    float32 or memory-mapped matrix is not copied as a whole.
+    """
+    if not isinstance(X, np.ndarray):
+        X = np.asarray(X, dtype=np.float64)
+    _, codes = np.unique(labels, return_inverse=True)
+    counts = np.bincount(codes)
+    n_clusters = len(counts)
+    rows = np.arange(len(X)) if rows is None else np.asarray(rows)
+
+    sums = _cluster_distance_sums(X, codes, n_clusters, rows, block_size)
+    own = codes[rows]
+    own_counts = counts[own]
+
+    # a: rata-rata jarak ke cluster sendiri (tanpa dirinya), b: cluster lain terdekat
+    a = sums[np.arange(len(rows)), own] / np.maximum(own_counts - 1, 1)
+    mean_other = sums / counts
+    mean_other[np.arange(len(rows)), own] = np.inf
+    b = mean_other.min(axis=1)
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        values = (b - a) / np.maximum(a, b)
+    # Konvensi sklearn: cluster berisi satu titik bernilai 0
+    values[own_counts == 1] = 0
+    return np.nan_to_num(values)
+
+def silhouette_exact(X, labels, block_size=2048):
+    """Exact mean silhouette with distances computed in bounded-memory blocks"""
+    return float(silhouette_values(X, labels, block_size=block_size).mean())
+
+def silhouette_sampled(X, labels, sample_size=2_000, confidence=0.95, random_state=42, block_size=2048):
+    """Stratified-sample silhouette estimate with a confidence interval.
+
+    Each cluster is sampled proportionally to its size (at least two rows).
+    Sampled rows are scored against the whole dataset, so the only error is
+    sampling error. Returns ``(estimate, (low, high))``.
+    """
+    rng = np.random.default_rng(random_state)
+    labels = np.asarray(labels)
+    _, codes = np.unique(labels, return_inverse=True)
+    counts = np.bincount(codes)
+    n_total = len(codes)
+
+    strata = []
+    for cluster, n_cluster in enumerate(counts):
+        members = np.flatnonzero(codes == cluster)
+        n_sample = min(n_cluster, max(2, round(sample_size * n_cluster / n_total)))
+        strata.append(rng.choice(members, size=n_sample, replace=False))
+
+    values = silhouette_values(X, labels, rows=np.concatenate(strata), block_size=block_size)
+
+    # Estimator stratified: rata-rata tertimbang ukuran cluster, dengan koreksi populasi terbatas
+    estimate = 0.0
+    variance = 0.0
+    offset = 0
+    for members_sample, n_cluster in zip(strata, counts):
+        n_sample = len(members_sample)
+        stratum = values[offset:offset + n_sample]
+        offset += n_sample
+        weight = n_cluster / n_total
+        estimate += weight * stratum.mean()
+        if n_sample > 1:
+            variance += weight ** 2 * stratum.var(ddof=1) / n_sample * (1 - n_sample / n_cluster)
+
+    margin = NormalDist().inv_cdf(0.5 + confidence / 2) * np.sqrt(variance)
+    return float(estimate), (float(estimate - margin), float(estimate + margin))
+
+def evaluate_silhouette(X, labels, exact_max_rows=EXACT_MAX_ROWS, **kwargs):
+    """Pick exact or sampled silhouette by dataset size.
+
+    Returns a dict with ``score``, ``ci`` (``None`` for exact) and ``method``.
+    """
+    if len(X) <= exact_max_rows:
+        return {'score': silhouette_exact(X, labels), 'ci': None, 'method': 'exact'}
+    score, ci = silhouette_sampled(X, labels, **kwargs)
+    return {'score': score, 'ci': ci, 'method': 'sampled'}
@@ -0,0 +1,276 @@
+"""
+Format penyimpanan kolumnar bertipe untuk dataset pengeluaran mahasiswa.
+
+Nominal Rupiah selalu kelipatan seribu, jadi disimpan sebagai integer ribuan
+(int32) dan dibaca kembali sebagai int64 Rupiah.
+Semester dan cluster disimpan int8, kategori sebagai kode + daftar label, dan
+rasio sebagai float32. File .npz (satu array per kolom) menjadi format utama;
+CSV tetap ditulis untuk ekspor.
+
+Pemakaian:
+    python storage.py --report                      # waktu baca dan ukuran CSV vs .npz
+    python storage.py --report big.csv              # laporan untuk file lain (dibuat big.npz)
+    python storage.py --convert data.csv            # CSV -> data.npz
+    python storage.py --export-csv student_spending_data.npz
+"""
+
+import argparse
+import json
+import os
+import struct
+import time
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+DATA_PATH = 'student_spending_data.npz'
+CLUSTERED_PATH = 'student_spending_clustered.npz'
+# Hasil clustering mode minibatch: shard .npz per chunk plus manifest.json
+CLUSTERED_SHARDS_DIR = 'student_spending_clustered'
+FORMAT_VERSION = 1
+
+# Rupiah disimpan dalam satuan ribuan
+MONEY_UNIT = 1000
+
+# Tipe penyimpanan per kolom: 'money', 'category' atau dtype NumPy
+SCHEMA = {
+    'uang_saku': 'money',
+    'pengeluaran_makanan': 'money',
+    'pengeluaran_transport': 'money',
+    'pengeluaran_hiburan': 'money',
+    'semester': 'int8',
+    'total_pengeluaran': 'money',
+    'rasio_pengeluaran': 'float32',
+    'sisa_uang': 'money',
+    'cluster': 'int8',
+    'kategori_pengeluaran': 'category'
+}
+
+def _encode_money(name, values):
+    """Rupiah amounts -> int32 thousands; raises ValueError if that would lose information"""
+    values = np.asarray(values, dtype=np.float64)
+    thousands = np.rint(values / MONEY_UNIT)
+    if not np.array_equal(thousands * MONEY_UNIT, values):
+        raise ValueError(f"Kolom {name} berisi nilai yang bukan kelipatan {MONEY_UNIT}")
+    if len(thousands) and np.abs(thousands).max() > np.iinfo(np.int32).max:
+        raise ValueError(f"Kolom {name} terlalu besar untuk int32 ribuan")
+    return thousands.astype(np.int32)
+
+def _decode_money(thousands):
+    """int32 thousands -> int64 Rupiah"""
+    # int32 hanya di disk: penjumlahan kolom int32 di pandas overflow tanpa peringatan
+    return thousands.astype(np.int64) * MONEY_UNIT
+
+def _check_integer(name, values, dtype):
+    values = np.asarray(values)
+    info = np.iinfo(dtype)
+    if len(values) and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(f"Kolom {name} di luar rentang {np.dtype(dtype).name}")
+    if values.dtype.kind == 'f' and not np.array_equal(values, np.round(values)):
+        raise ValueError(f"Kolom {name} harus berupa bilangan bulat")
+    return values.astype(dtype)
+
+def encode_frame(df):
+    """Encode every column of ``df`` into the arrays stored on disk.
+
+    Columns outside ``SCHEMA`` are kept with their own dtype.
+    """
+    arrays = {}
+    for name in df.columns:
+        kind = SCHEMA.get(name)
+        values = df[name]
+        if kind == 'money':
+            arrays[name] = _encode_money(name, values)
+        elif kind == 'category':
+            categorical = pd.Categorical(values)
+            arrays[f'{name}.codes'] = categorical.codes.astype(np.int8)
+            arrays[f'{name}.categories'] = np.asarray(categorical.categories, dtype=str)
+        elif kind in ('int8', 'int16', 'int32'):
+            arrays[name] = _check_integer(name, values.to_numpy(), np.dtype(kind))
+        elif kind is not None:
+            arrays[name] = values.to_numpy(dtype=kind)
+        else:
+            arrays[name] = values.to_numpy()
+    return arrays
+
+def to_typed_frame(df):
+    """Convert a frame with Rupiah floats (e.g. from CSV) to the compact in-memory dtypes"""
+    return decode_arrays(encode_frame(df), list(df.columns))
+
+def decode_arrays(arrays, columns):
+    """Build the typed DataFrame for ``columns`` from stored arrays"""
+    data = {}
+    for name in columns:
+        kind = SCHEMA.get(name)
+        if kind == 'money':
+            data[name] = _decode_money(arrays[name])
+        elif kind == 'category':
+            data[name] = pd.Categorical.from_codes(arrays[f'{name}.codes'], categories=list(arrays[f'{name}.categories']))
+        else:
+            data[name] = arrays[name]
+    return pd.DataFrame(data)
+
+def save_table(df, path, csv_path=None):
+    """Write ``df`` as a typed .npz table, plus a CSV export when ``csv_path`` is given"""
+    meta = {'version': FORMAT_VERSION, 'columns': list(df.columns), 'rows': len(df), 'money_unit': MONEY_UNIT}
+    arrays = encode_frame(df)
+    np.savez(path, __meta__=np.array(json.dumps(meta)), **arrays)
+    if csv_path:
+        decode_arrays(arrays, list(df.columns)).to_csv(csv_path, index=False)
+
+def load_table(path, columns=None):
+    """Read a typed .npz table; only the requested ``columns`` are decoded"""
+    with np.load(path) as arrays:
+        meta = json.loads(str(arrays['__meta__']))
+        if meta['version'] != FORMAT_VERSION:
+            raise ValueError(f"Versi format {path} tidak didukung: {meta['version']}")
+        return decode_arrays(arrays, columns or meta['columns'])
+
+def _npz_columns(path):
+    """Locate the column data inside an uncompressed .npz; None if a member is compressed.
+
+    np.savez stores each .npy file uncompressed in the zip, so a 1-D column
+    lies contiguously in the file. Returns ``{name: (offset, dtype)}`` for
+    those columns and loaded arrays for the rest (metadata, category labels).
+    """
+    columns = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                return None
+            # Local file header: 30 byte + nama file + extra field, lalu data .npy
+            f.seek(info.header_offset)
+            name_length, extra_length = struct.unpack('<HH', f.read(30)[26:30])
+            f.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(f)
+            if version == (1, 0):
+                shape, _, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, _, dtype = np.lib.format.read_array_header_2_0(f)
+            name = info.filename[:-len('.npy')]
+            if len(shape) == 1 and not dtype.hasobject and not name.endswith('.categories'):
+                columns[name] = (f.tell(), dtype)
+            else:
+                columns[name] = np.load(zf.open(info))
+    return columns
+
+def iter_table_chunks(path, chunk_size, columns=None):
+    """Yield typed row chunks of a .npz table without loading whole columns.
+
+    Each chunk reads only its ``chunk_size`` rows of the requested columns
+    from the file, so memory stays bounded by the chunk size. Tables with
+    compressed members fall back to loading the requested columns once.
+    """
+    stored = _npz_columns(path)
+    if stored is None:
+        df = load_table(path, columns)
+        for start in range(0, len(df), chunk_size):
+            yield df.iloc[start:start + chunk_size]
+        return
+    meta = json.loads(str(stored['__meta__']))
+    if meta['version'] != FORMAT_VERSION:
+        raise ValueError(f"Versi format {path} tidak didukung: {meta['version']}")
+    columns = columns or meta['columns']
+    names = [f'{name}.codes' if SCHEMA.get(name) == 'category' else name for name in columns]
+    with open(path, 'rb') as f:
+        for start in range(0, meta['rows'], chunk_size):
+            n = min(chunk_size, meta['rows'] - start)
+            chunk = {name: values for name, values in stored.items() if name.endswith('.categories')}
+            for name in names:
+                offset, dtype = stored[name]
+                f.seek(offset + start * dtype.itemsize)
+                chunk[name] = np.fromfile(f, dtype=dtype, count=n)
+            df = decode_arrays(chunk, columns)
+            # Indeks baris berlanjut antar chunk, seperti pd.read_csv(chunksize=...)
+            df.index = pd.RangeIndex(start, start + n)
+            yield df
+
+def read_dataset(path, columns=None):
+    """Read a dataset from .npz, a shard manifest.json, or CSV converted to the same typed columns.
+
+    Shards are concatenated into one frame, so this loads the whole sharded
+    dataset into memory; use iter_dataset_chunks() to stream it.
+    """
+    if path.endswith('manifest.json'):
+        # Shard selalu dibaca per file, chunk_size tidak dipakai
+        return pd.concat(list(iter_dataset_chunks(path, None, columns, typed=True)), ignore_index=True)
+    if path.endswith('.npz'):
+        return load_table(path, columns)
+    return to_typed_frame(pd.read_csv(path, usecols=columns))
+
+def iter_dataset_chunks(path, chunk_size, columns=None, typed=False):
+    """Yield row chunks of a .npz table, a CSV file or a shard manifest.json.
+
+    CSV chunks are returned as parsed (not converted), so arbitrary input
+    files can be streamed; with ``typed`` they are converted like
+    read_dataset() does. .npz tables are memory-mapped and decoded one
+    chunk at a time, shards are yielded one file at a time.
+    """
+    if path.endswith('manifest.json'):
+        # Shard dari generate_data.py --stream
+        from generate_data import iter_shard_frames
+        for df in iter_shard_frames(path, columns=columns):
+            yield to_typed_frame(df) if typed else df
+    elif path.endswith('.npz'):
+        yield from iter_table_chunks(path, chunk_size, columns)
+    else:
+        for df in pd.read_csv(path, usecols=columns, chunksize=chunk_size):
+            yield to_typed_frame(df) if typed else df
+
+def best_seconds(func, repeats=3):
+    """Fastest of ``repeats`` timed calls of ``func``, in seconds"""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def storage_report(csv_path, npz_path):
+    """Compare parse time, file size and memory of the CSV and the typed table"""
+    if not os.path.exists(npz_path):
+        save_table(pd.read_csv(csv_path), npz_path)
+
+    csv_seconds = best_seconds(lambda: pd.read_csv(csv_path))
+    npz_seconds = best_seconds(lambda: load_table(npz_path))
+    df_csv = pd.read_csv(csv_path)
+    df_npz = load_table(npz_path)
+    csv_memory = df_csv.memory_usage(deep=True).sum()
+    npz_memory = df_npz.memory_usage(deep=True).sum()
+    csv_size = os.path.getsize(csv_path)
+    npz_size = os.path.getsize(npz_path)
+
+    print(f"=== {csv_path} vs {npz_path} ({len(df_npz):,} baris) ===")
+    print(f"{'':<14} {'CSV':>12} {'npz':>12} {'rasio':>8}")
+    print(f"{'Waktu baca':<14} {csv_seconds * 1000:>10.1f}ms {npz_seconds * 1000:>10.1f}ms {csv_seconds / npz_seconds:>7.1f}x")
+    print(f"{'Ukuran file':<14} {csv_size / 1e3:>10.1f}kB {npz_size / 1e3:>10.1f}kB {csv_size / npz_size:>7.1f}x")
+    print(f"{'Memori':<14} {csv_memory / 1e3:>10.1f}kB {npz_memory / 1e3:>10.1f}kB {csv_memory / npz_memory:>7.1f}x")
+    print("\nTipe kolom:")
+    print(pd.DataFrame({'CSV': df_csv.dtypes.astype(str), 'npz': df_npz.dtypes.astype(str)}).to_string())
+
+def main():
+    parser = argparse.ArgumentParser(description="Konversi dan laporan format penyimpanan kolumnar")
+    parser.add_argument('--report', nargs='*', metavar='CSV',
+                        help="Bandingkan CSV dengan .npz-nya (default: dataset dan hasil clustering)")
+    parser.add_argument('--convert', metavar='CSV', help="Konversi CSV ke .npz dengan nama yang sama")
+    parser.add_argument('--export-csv', metavar='NPZ', help="Ekspor tabel .npz ke CSV dengan nama yang sama")
+    args = parser.parse_args()
+
+    if args.convert:
+        output = os.path.splitext(args.convert)[0] + '.npz'
+        save_table(pd.read_csv(args.convert), output)
+        print(f"Tabel disimpan ke {output}")
+    if args.export_csv:
+        output = os.path.splitext(args.export_csv)[0] + '.csv'
+        load_table(args.export_csv).to_csv(output, index=False)
+        print(f"CSV disimpan ke {output}")
+    if args.report is not None:
+        pairs = [(path, os.path.splitext(path)[0] + '.npz') for path in args.report] or \
+            [('student_spending_data.csv', DATA_PATH), ('student_spending_clustered.csv', CLUSTERED_PATH)]
+        for csv_path, npz_path in pairs:
+            storage_report(csv_path, npz_path)
+            print()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Mean dan varians satu pass per chunk, bisa digabung antar shard, untuk StandardScaler.
+
+Setiap chunk diringkas menjadi (n, mean, M2), dengan M2 jumlah kuadrat selisih
+terhadap mean chunk itu sendiri (dua pass di dalam chunk yang sudah ada di RAM).
+Ringkasan digabung dengan rumus paralel Chan, Golub & LeVeque, sehingga hasilnya
+stabil secara numerik walaupun nominal Rupiah besar dan jumlah baris miliaran, dan
+shard bisa diringkas di proses terpisah lalu digabung. Scaler yang dihasilkan sama
+dengan StandardScaler.fit pada seluruh data (dalam toleransi float).
+
+Pemakaian:
+    python streaming_stats.py student_spending_data.npz
+    python streaming_stats.py data/shards/manifest.json --workers 4 --no-compare
+"""
+
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from inference import features_for_clustering
+from instrumentation import span
+from storage import DATA_PATH, iter_dataset_chunks, read_dataset
+
+class RunningStats:
+    """Count, mean and sum of squared deviations (M2) per column"""
+
+    def __init__(self, n_features):
+        self.n = 0
+        self.mean = np.zeros(n_features)
+        self.m2 = np.zeros(n_features)
+
+    def update(self, X):
+        """Fold a chunk of rows into the statistics"""
+        X = np.asarray(X, dtype=np.float64)
+        if not len(X):
+            return self
+        chunk = RunningStats(X.shape[1])
+        chunk.n = len(X)
+        chunk.mean = X.mean(axis=0)
+        chunk.m2 = ((X - chunk.mean) ** 2).sum(axis=0)
+        return self.merge(chunk)
+
+    def merge(self, other):
+        """Combine with statistics of a disjoint set of rows (Chan et al.)"""
+        if not other.n:
+            return self
+        if not self.n:
+            self.n, self.mean, self.m2 = other.n, other.mean.copy(), other.m2.copy()
+            return self
+        n = self.n + other.n
+        delta = other.mean - self.mean
+        self.mean = self.mean + delta * (other.n / n)
+        self.m2 = self.m2 + other.m2 + delta ** 2 * (self.n * other.n / n)
+        self.n = n
+        return self
+
+    @property
+    def var(self):
+        """Population variance (ddof=0), as StandardScaler uses"""
+        return self.m2 / self.n
+
+    def to_scaler(self, feature_names=features_for_clustering):
+        """A fitted StandardScaler with these statistics"""
+        from sklearn.preprocessing import StandardScaler
+
+        var = self.var
+        scale = np.sqrt(var)
+        # Fitur (hampir) konstan diberi scale 1, dengan batas yang sama seperti scikit-learn
+        eps = np.finfo(np.float64).eps
+        scale[var <= self.n * eps * var + (self.n * self.mean * eps) ** 2] = 1.0
+
+        scaler = StandardScaler()
+        scaler.mean_ = self.mean.copy()
+        scaler.var_ = var
+        scaler.scale_ = scale
+        scaler.n_samples_seen_ = np.int64(self.n)
+        scaler.n_features_in_ = len(self.mean)
+        if feature_names is not None:
+            scaler.feature_names_in_ = np.array(feature_names, dtype=object)
+        return scaler
+
+def chunk_stats(chunks, columns=features_for_clustering):
+    """Statistics of ``columns`` over an iterable of DataFrame chunks"""
+    stats = RunningStats(len(columns))
+    for chunk in chunks:
+        stats.update(chunk[columns])
+    return stats
+
+def shard_stats(task):
+    """Statistics of one shard file; runs inside a pool worker"""
+    from generate_data import read_shard
+    from storage import to_typed_frame
+
+    path, columns = task
+    df = read_shard(path, columns)
+    return chunk_stats([df if path.endswith('.npz') else to_typed_frame(df)], columns)
+
+def compute_stats(source=DATA_PATH, columns=features_for_clustering, chunk_size=1_000_000, workers=1):
+    """Streaming statistics of ``columns`` in a .npz table, CSV file or shard manifest.json.
+
+    Shards are summarised in a process pool of ``workers`` and merged in
+    manifest order, so the result does not depend on the worker count.
+    """
+    with span('streaming_stats.compute', workers=workers) as stats_span:
+        if source.endswith('manifest.json') and workers > 1:
+            from generate_data import shard_paths
+
+            tasks = [(path, columns) for path in shard_paths(source)]
+            stats = RunningStats(len(columns))
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                for part in executor.map(shard_stats, tasks):
+                    stats.merge(part)
+        else:
+            stats = chunk_stats(iter_dataset_chunks(source, chunk_size, columns, typed=True), columns)
+        stats_span.set(rows=stats.n)
+    return stats
+
+def fit_streaming_scaler(source=DATA_PATH, columns=features_for_clustering, chunk_size=1_000_000, workers=1):
+    """StandardScaler fitted on ``source`` without loading it into memory at once"""
+    return compute_stats(source, columns, chunk_size, workers).to_scaler(columns)
+
+def compare_with_standard_scaler(scaler, source, columns=features_for_clustering):
+    """Largest relative difference of mean and variance against StandardScaler.fit on all rows"""
+    from sklearn.preprocessing import StandardScaler
+
+    reference = StandardScaler().fit(read_dataset(source, columns)[columns])
+    return {
+        'mean': float((np.abs(scaler.mean_ - reference.mean_) / np.abs(reference.mean_)).max()),
+        'var': float((np.abs(scaler.var_ - reference.var_) / reference.var_).max())
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistik scaler satu pass untuk dataset besar atau ter-shard")
+    parser.add_argument('input', nargs='?', default=DATA_PATH, help="Tabel .npz, file CSV atau manifest.json shard")
+    parser.add_argument('--chunk-size', type=int, default=1_000_000, help="Jumlah baris per chunk")
+    parser.add_argument('--workers', type=int, default=1, help="Jumlah proses untuk shard manifest.json")
+    parser.add_argument('--no-compare', action='store_true',
+                        help="Jangan bandingkan dengan StandardScaler.fit (yang memuat seluruh data)")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    stats = compute_stats(args.input, chunk_size=args.chunk_size, workers=args.workers)
+    seconds = time.perf_counter() - start
+    print(f"=== STATISTIK STREAMING ({stats.n:,} baris, {seconds:.2f} s) ===")
+    print(f"{'Fitur':<24} {'mean':>14} {'std':>14}")
+    for name, mean, var in zip(features_for_clustering, stats.mean, stats.var):
+        print(f"{name:<24} {mean:>14,.4f} {np.sqrt(var):>14,.4f}")
+
+    if not args.no_compare:
+        start = time.perf_counter()
+        diff = compare_with_standard_scaler(stats.to_scaler(), args.input)
+        print(f"\nStandardScaler.fit pada seluruh data: {time.perf_counter() - start:.2f} s")
+        print(f"Selisih relatif maksimum: mean {diff['mean']:.2e}, varians {diff['var']:.2e}")
+
+if __name__ == "__main__":
+    main()
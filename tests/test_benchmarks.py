@@ -0,0 +1,36 @@
+"""--filter must not build the setup of groups it excludes, and the case name lists must match the cases."""
+
+import os
+
+import pytest
+
+import benchmarks
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def built(monkeypatch):
+    monkeypatch.setattr(benchmarks, 'measure', lambda func: 1e-3)
+    calls = []
+    monkeypatch.setattr(benchmarks, 'sized_cases', lambda n: calls.append(n) or {'generate_batch': None})
+    monkeypatch.setattr(benchmarks, 'per_call_cases', lambda: calls.append('per_call') or {'get_recommendations': None})
+    return calls
+
+def test_filter_skips_groups_without_matching_cases(built):
+    results = benchmarks.run_suite((1000, 1_000_000), 'get_recommendations')
+    assert built == ['per_call']
+    assert list(results) == ['get_recommendations']
+
+def test_filter_on_size_builds_only_that_group(built):
+    results = benchmarks.run_suite((1000, 1_000_000), '[n=1000]')
+    assert built == [1000]
+    assert list(results) == ['generate_batch[n=1000]']
+
+def test_filter_without_match_builds_nothing(built):
+    assert benchmarks.run_suite((1000,), 'tidak_ada') == {}
+    assert built == []
+
+def test_case_names_cover_built_cases(monkeypatch):
+    monkeypatch.chdir(REPO_DIR)
+    assert set(benchmarks.sized_cases(200)) == set(benchmarks.SIZED_CASE_NAMES)
+    assert set(benchmarks.per_call_cases()) <= set(benchmarks.PER_CALL_CASE_NAMES)
@@ -0,0 +1,35 @@
+"""verify_lookup_table must not count inputs left to the model fallback as agreement."""
+
+import math
+import os
+
+import pytest
+
+from inference import load_predictor
+from lookup_table import verify_lookup_table
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+class FixedTable:
+    """Stand-in table that answers every lookup with the same code"""
+
+    def __init__(self, code):
+        self.code = code
+
+    def lookup(self, uang_saku, makanan, transport, hiburan, semester):
+        return self.code
+
+@pytest.fixture
+def predictor(monkeypatch):
+    monkeypatch.chdir(REPO_DIR)
+    return load_predictor()
+
+def test_table_that_always_falls_back_has_no_agreement(predictor):
+    agreement, fallback_rate = verify_lookup_table(FixedTable(None), predictor, 1000)
+    assert math.isnan(agreement)
+    assert fallback_rate == 1.0
+
+def test_agreement_counts_only_answered_inputs(predictor):
+    agreement, fallback_rate = verify_lookup_table(FixedTable(0), predictor, 1000)
+    assert fallback_rate == 0.0
+    assert 0.0 < agreement < 1.0
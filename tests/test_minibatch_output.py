@@ -0,0 +1,32 @@
+"""A minibatch run must not leave clustered rows or a peer index from an earlier model behind."""
+
+import os
+import subprocess
+import sys
+
+from storage import read_dataset
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_script(script, *args, cwd):
+    result = subprocess.run([sys.executable, '-W', 'ignore', os.path.join(REPO_DIR, script), *args],
+                            cwd=cwd, capture_output=True, text=True, env={**os.environ, 'MPLBACKEND': 'Agg'})
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+def test_minibatch_replaces_clustered_table_and_peer_index(tmp_path):
+    run_script('generate_data.py', '--mode', 'batch', '--n-samples', '3000', cwd=tmp_path)
+    for stale in ('student_spending_clustered.npz', 'peer_index.pkl'):
+        (tmp_path / stale).write_bytes(b'model lama')
+
+    run_script('kmeans_analysis.py', '--mode', 'minibatch', '--chunk-size', '1000', cwd=tmp_path)
+    assert not (tmp_path / 'student_spending_clustered.npz').exists()
+    assert not (tmp_path / 'peer_index.pkl').exists()
+
+    manifest = os.path.join('student_spending_clustered', 'manifest.json')
+    output = run_script('peer_index.py', '--build', '--input', manifest, cwd=tmp_path)
+    assert 'Peer index (3,000 mahasiswa)' in output
+
+    clustered = read_dataset(str(tmp_path / manifest))
+    assert len(clustered) == 3000
+    assert set(clustered['kategori_pengeluaran']) == {'Hemat', 'Sedang', 'Boros'}
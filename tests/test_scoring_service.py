@@ -0,0 +1,78 @@
+"""Request validation and error responses of the scoring service."""
+
+import asyncio
+import json
+
+import pytest
+
+from scoring_service import RequestError, parse_record, start_service
+
+VALID = {'uang_saku': 1000000, 'pengeluaran_makanan': 400000, 'pengeluaran_transport': 150000,
+         'pengeluaran_hiburan': 100000, 'semester': 3}
+
+@pytest.mark.parametrize('changes', [
+    {'uang_saku': 'nan'},
+    {'pengeluaran_makanan': 'inf'},
+    {'pengeluaran_hiburan': '-Infinity'},
+    {'pengeluaran_transport': -1000},
+    {'uang_saku': 0},
+    {'semester': 99},
+    {'semester': 0},
+    {'semester': 2.5},
+])
+def test_parse_record_rejects_invalid_values(changes):
+    with pytest.raises(RequestError):
+        parse_record({**VALID, **changes})
+
+def test_parse_record_accepts_app_inputs():
+    assert parse_record({**VALID, 'pengeluaran_hiburan': 0, 'semester': '8'})[-1] == 8
+
+async def post(port, payload):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    # bytes dikirim apa adanya, untuk body yang bukan JSON
+    body = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+    writer.write(b"POST /predict HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n"
+                 b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body)
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    head, _, body = response.partition(b'\r\n\r\n')
+    return int(head.split()[1]), json.loads(body)
+
+async def run_requests(payloads, fail=False):
+    server, batcher = await start_service('127.0.0.1', 0, max_batch_size=8, max_wait_ms=20)
+    if fail:
+        def score(rows):
+            raise RuntimeError("model rusak")
+        batcher.score = score
+    port = server.sockets[0].getsockname()[1]
+    try:
+        return await asyncio.wait_for(asyncio.gather(*(post(port, payload) for payload in payloads)), 10)
+    finally:
+        server.close()
+        await server.wait_closed()
+        await batcher.stop()
+
+def test_invalid_value_returns_400():
+    [(status, body)] = asyncio.run(run_requests([{**VALID, 'uang_saku': 'nan'}]))
+    assert status == 400
+    assert 'error' in body
+
+def test_invalid_json_returns_400():
+    [(status, body)] = asyncio.run(run_requests([b'{"uang_saku": 1000000,']))
+    assert status == 400
+    assert 'error' in body
+
+def test_invalid_utf8_returns_400():
+    [(status, body)] = asyncio.run(run_requests([b'{"uang_saku": "\xff\xfe"}']))
+    assert status == 400
+    assert 'error' in body
+
+def test_valid_request_returns_200():
+    [(status, body)] = asyncio.run(run_requests([VALID]))
+    assert status == 200
+    assert body['kategori_pengeluaran'] in ('Hemat', 'Sedang', 'Boros')
+
+def test_scoring_error_returns_500_to_every_waiter():
+    responses = asyncio.run(run_requests([VALID, [VALID, VALID], VALID], fail=True))
+    assert [status for status, _ in responses] == [500, 500, 500]
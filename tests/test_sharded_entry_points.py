@@ -0,0 +1,54 @@
+"""Entry points that accept a shard manifest.json must also run their in-memory comparison on it,
+and the feature store must notice when the shards behind an unchanged manifest change."""
+
+import os
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+from feature_store import ensure_feature_store
+from generate_data import shard_paths, write_sharded_dataset
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def run_script(script, *args, cwd):
+    result = subprocess.run([sys.executable, '-W', 'ignore', os.path.join(REPO_DIR, script), *args],
+                            cwd=cwd, capture_output=True, text=True, env={**os.environ, 'MPLBACKEND': 'Agg'})
+    assert result.returncode == 0, result.stderr
+    return result.stdout
+
+@pytest.fixture(scope='module', params=['npz', 'csv'])
+def manifest(request, tmp_path_factory):
+    work_dir = tmp_path_factory.mktemp(f'shards_{request.param}')
+    run_script('generate_data.py', '--mode', 'batch', '--stream', '--n-samples', '3000', '--chunk-size', '1000',
+               '--output-dir', 'shards', '--formats', request.param, cwd=work_dir)
+    return work_dir, os.path.join('shards', 'manifest.json')
+
+def test_streaming_stats_compares_manifest(manifest):
+    work_dir, path = manifest
+    output = run_script('streaming_stats.py', path, '--workers', '2', cwd=work_dir)
+    assert '3,000 baris' in output
+    assert 'Selisih relatif maksimum' in output
+
+def test_feature_store_verifies_manifest(manifest):
+    work_dir, path = manifest
+    output = run_script('feature_store.py', '--input', path, '--output-dir', 'store', '--verify', cwd=work_dir)
+    assert 'Matriks: 3,000 x 6' in output
+    max_diff = float(output.split('Selisih maksimum dengan fit ulang: ')[1].split()[0])
+    assert max_diff < 1e-9
+
+def test_feature_store_rebuilds_when_shards_change(tmp_path):
+    manifest = str(tmp_path / 'shards' / 'manifest.json')
+    write_sharded_dataset(2000, str(tmp_path / 'shards'), chunk_size=1000, formats=('npz',))
+    store_dir = str(tmp_path / 'store')
+    before = ensure_feature_store(manifest, store_dir).X[:1000].copy()
+
+    # Shard ditulis ulang dengan tata letak yang sama: manifest.json tidak berubah
+    first, second = shard_paths(manifest)
+    os.replace(second, first)
+    write_sharded_dataset(1000, str(tmp_path / 'other'), chunk_size=1000, seed=7, formats=('npz',))
+    os.replace(str(tmp_path / 'other' / 'shard-00000.npz'), second)
+    after = ensure_feature_store(manifest, store_dir).X[:1000]
+    assert not np.array_equal(before, after)
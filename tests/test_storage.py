@@ -0,0 +1,36 @@
+"""Chunked reads of .npz tables must match reading the whole table."""
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from storage import iter_dataset_chunks, load_table, save_table
+
+@pytest.fixture
+def table(tmp_path):
+    rng = np.random.default_rng(0)
+    n = 1003
+    df = pd.DataFrame({
+        'uang_saku': rng.integers(400, 2000, n) * 1000,
+        'pengeluaran_makanan': rng.integers(0, 800, n) * 1000,
+        'semester': rng.integers(1, 9, n),
+        'rasio_pengeluaran': rng.random(n).astype(np.float32),
+        'kategori_pengeluaran': rng.choice(['Hemat', 'Sedang', 'Boros'], n)
+    })
+    path = str(tmp_path / 'table.npz')
+    save_table(df, path)
+    return path
+
+@pytest.mark.parametrize('chunk_size', [1, 100, 1003, 5000])
+@pytest.mark.parametrize('columns', [None, ['rasio_pengeluaran', 'uang_saku'], ['kategori_pengeluaran']])
+def test_npz_chunks_match_full_table(table, chunk_size, columns):
+    chunks = list(iter_dataset_chunks(table, chunk_size, columns))
+    assert max(len(chunk) for chunk in chunks) <= chunk_size
+    pd.testing.assert_frame_equal(pd.concat(chunks), load_table(table, columns))
+
+def test_money_sums_do_not_overflow(tmp_path):
+    path = str(tmp_path / 'big.npz')
+    save_table(pd.DataFrame({'uang_saku': [2_000_000_000], 'sisa_uang': [2_000_000_000]}), path)
+    df = load_table(path)
+    assert df['uang_saku'].dtype == np.int64
+    assert (df['uang_saku'] + df['sisa_uang']).iloc[0] == 4_000_000_000
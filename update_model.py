@@ -0,0 +1,191 @@
+"""
+Update model K-Means secara inkremental dengan data mahasiswa baru.
+
+Data baru dilipat ke statistik scaler (StandardScaler.partial_fit) dan ke centroid
+(rata-rata berjalan per cluster, dengan jumlah anggota dari cluster_summary.json).
+Id cluster tidak berubah, sehingga label Hemat/Sedang/Boros tetap stabil. Drift
+centroid dan perubahan inertia diukur, lalu retrain penuh hanya disarankan bila
+melewati ambang batas.
+
+Pemakaian:
+    python update_model.py data_baru.csv             # update dan simpan artifact
+    python update_model.py data_baru.csv --dry-run   # hanya laporan drift
+"""
+
+import argparse
+import json
+
+import numpy as np
+import pandas as pd
+import joblib
+from sklearn.cluster import MiniBatchKMeans
+
+from kmeans_analysis import (features_for_clustering, label_clusters, predict_clusters, save_artifacts,
+                             save_cluster_summary, summary_columns)
+from predict import INPUT_COLUMNS, build_feature_matrix
+from storage import load_table
+
+# Ambang retrain: pergeseran centroid (satuan std) dan rasio inertia per baris
+DRIFT_THRESHOLD = 0.25
+INERTIA_THRESHOLD = 1.5
+
+def load_summary_sums(path='cluster_summary.json'):
+    """Per-category column sums, counts, percentile tables and the training inertia from cluster_summary.json"""
+    with open(path) as f:
+        summary = json.load(f)
+    counts = pd.Series({kategori: details['count'] for kategori, details in summary['categories'].items()})
+    sums = pd.DataFrame({
+        kategori: {column: details['means'][column] * details['count'] for column in summary_columns}
+        for kategori, details in summary['categories'].items()
+    }).T
+    quantiles = {kategori: details['quantiles'] for kategori, details in summary['categories'].items()
+                 if 'quantiles' in details}
+    return sums, counts, quantiles, summary.get('inertia')
+
+def update_centroids(kmeans_model, scaler, new_scaler, X_new, cluster_counts):
+    """Fold new rows into the centroids as a running mean per cluster.
+
+    New rows are assigned with the current model. Centroids are averaged in
+    raw units and then expressed in the updated scaler's units. Returns
+    ``(new_centers, clusters_new)``.
+    """
+    clusters_new = predict_clusters(kmeans_model, scaler, X_new)
+    n_clusters = len(kmeans_model.cluster_centers_)
+    centers_raw = kmeans_model.cluster_centers_ * scaler.scale_ + scaler.mean_
+
+    new_counts = np.bincount(clusters_new, minlength=n_clusters)
+    new_sums = np.zeros_like(centers_raw)
+    np.add.at(new_sums, clusters_new, X_new.to_numpy())
+    total = cluster_counts + new_counts
+    updated_raw = (centers_raw * cluster_counts[:, None] + new_sums) / np.maximum(total, 1)[:, None]
+    return (updated_raw - new_scaler.mean_) / new_scaler.scale_, clusters_new
+
+def update_model(new_data, drift_threshold=DRIFT_THRESHOLD, inertia_threshold=INERTIA_THRESHOLD, dry_run=False):
+    """Fold ``new_data`` into the saved model and return a drift report dict"""
+    kmeans_model = joblib.load('kmeans_model.pkl')
+    scaler = joblib.load('scaler.pkl')
+    cluster_labels = joblib.load('cluster_labels.pkl')
+    sums, counts, quantiles, inertia = load_summary_sums()
+    if inertia is None and not isinstance(kmeans_model, MiniBatchKMeans):
+        # Ringkasan lama tanpa inertia: KMeans penuh menyimpan inertia semua baris training
+        inertia = kmeans_model.inertia_
+
+    X_raw, total_pengeluaran, rasio_pengeluaran = build_feature_matrix(new_data)
+    X_new = pd.DataFrame(X_raw, columns=features_for_clustering)
+    cluster_ids = sorted(cluster_labels)
+    cluster_counts = np.array([counts[cluster_labels[cluster]] for cluster in cluster_ids], dtype=np.float64)
+
+    # Scaler: gabungkan statistik lama dengan data baru
+    new_scaler = joblib.load('scaler.pkl')
+    new_scaler.partial_fit(X_new)
+
+    new_centers, clusters_new = update_centroids(kmeans_model, scaler, new_scaler, X_new, cluster_counts)
+    old_centers = (kmeans_model.cluster_centers_ * scaler.scale_ + scaler.mean_ - new_scaler.mean_) / new_scaler.scale_
+    drift = np.sqrt(((new_centers - old_centers) ** 2).sum(axis=1))
+
+    # Inertia per baris: data baru terhadap model lama vs data training
+    X_new_scaled = scaler.transform(X_new)
+    new_inertia = ((X_new_scaled - kmeans_model.cluster_centers_[clusters_new]) ** 2).sum(axis=1).mean()
+    # MiniBatchKMeans.inertia_ hanya dari mini-batch terakhir; baseline diambil dari cluster_summary.json
+    train_inertia = inertia / counts.sum() if inertia is not None else None
+    inertia_ratio = new_inertia / train_inertia if train_inertia else None
+
+    # Ringkasan per kategori setelah update, dipakai juga untuk cek urutan label
+    kategori = pd.Series(clusters_new).map(cluster_labels)
+    new_frame = pd.DataFrame(X_raw[:, :4], columns=summary_columns[:4])
+    new_frame['total_pengeluaran'] = total_pengeluaran
+    new_frame['rasio_pengeluaran'] = rasio_pengeluaran
+    grouped = new_frame.groupby(kategori.to_numpy())
+    updated_sums = sums.add(grouped.sum(), fill_value=0)
+    updated_counts = counts.add(grouped.size(), fill_value=0)
+    ratio_by_cluster = pd.Series({cluster: updated_sums.loc[cluster_labels[cluster], 'rasio_pengeluaran']
+                                  / updated_counts[cluster_labels[cluster]] for cluster in cluster_ids})
+    labels_stable = label_clusters(ratio_by_cluster) == cluster_labels
+
+    reasons = []
+    if drift.max() > drift_threshold:
+        reasons.append(f"drift centroid {drift.max():.3f} > {drift_threshold}")
+    if inertia_ratio is not None and inertia_ratio > inertia_threshold:
+        reasons.append(f"inertia per baris naik {inertia_ratio:.2f}x > {inertia_threshold}x")
+    if not labels_stable:
+        reasons.append("urutan rasio antar cluster berubah, label tidak lagi sesuai")
+
+    report = {
+        'n_new': len(X_new),
+        'n_total': int(updated_counts.sum()),
+        'clusters': [
+            {'cluster': int(cluster), 'label': cluster_labels[cluster],
+             'n_before': int(cluster_counts[i]), 'n_new': int((clusters_new == cluster).sum()),
+             'drift': float(drift[i])}
+            for i, cluster in enumerate(cluster_ids)
+        ],
+        'train_inertia_per_row': float(train_inertia) if train_inertia is not None else None,
+        'new_inertia_per_row': float(new_inertia),
+        'inertia_ratio': float(inertia_ratio) if inertia_ratio is not None else None,
+        'scaler_mean_shift': float((np.abs(new_scaler.mean_ - scaler.mean_) / scaler.scale_).max()),
+        'retrain_recommended': bool(reasons),
+        'reasons': reasons
+    }
+
+    if not dry_run:
+        # Dtype model (float64 atau float32) dipertahankan
+        kmeans_model.cluster_centers_ = new_centers.astype(kmeans_model.cluster_centers_.dtype)
+        save_artifacts(kmeans_model, new_scaler, cluster_labels)
+        # Tabel persentil tetap dari data training sampai retrain penuh. Inertia disimpan
+        # sebagai jumlah, agar rasio per baris tetap bisa dihitung di update berikutnya
+        updated_inertia = inertia + new_inertia * len(X_new) if inertia is not None else None
+        save_cluster_summary(updated_sums, updated_counts.astype(np.int64), quantiles, updated_inertia)
+    return report
+
+def print_report(report, dry_run=False):
+    print("=== UPDATE MODEL INKREMENTAL ===")
+    print(f"Data baru: {report['n_new']:,} baris (total setelah update: {report['n_total']:,})\n")
+    print(f"{'Cluster':>7} {'Label':<8} {'n lama':>9} {'n baru':>9} {'drift':>8}")
+    for cluster in report['clusters']:
+        print(f"{cluster['cluster']:>7} {cluster['label']:<8} {cluster['n_before']:>9,} "
+              f"{cluster['n_new']:>9,} {cluster['drift']:>8.4f}")
+    if report['inertia_ratio'] is None:
+        print(f"\nInertia per baris     : data baru {report['new_inertia_per_row']:.4f} "
+              f"(inertia training tidak ada di cluster_summary.json, cek inertia dilewati)")
+    else:
+        print(f"\nInertia per baris     : training {report['train_inertia_per_row']:.4f}, "
+              f"data baru {report['new_inertia_per_row']:.4f} ({report['inertia_ratio']:.2f}x)")
+    print(f"Pergeseran mean scaler: {report['scaler_mean_shift']:.4f} std")
+
+    if report['retrain_recommended']:
+        print("\n⚠️ Disarankan retrain penuh (python kmeans_analysis.py, tambahkan --build-lut bila memakai "
+              "tabel lookup):")
+        for reason in report['reasons']:
+            print(f"  - {reason}")
+    else:
+        print("\n✅ Drift di bawah ambang batas, update inkremental cukup")
+
+    if dry_run:
+        print("(dry run: artifact tidak diubah)")
+    else:
+        print("Model, scaler, kmeans_inference.json dan cluster_summary.json diperbarui; "
+              "label cluster tidak berubah")
+        # Keduanya ditandai fingerprint model lama dan otomatis nonaktif setelah update
+        print("Tabel lookup dan indeks mahasiswa mirip sekarang nonaktif di app.py; bangun ulang dengan:")
+        print("  python lookup_table.py --build")
+        print("  python peer_index.py --build")
+
+def main():
+    parser = argparse.ArgumentParser(description="Update model K-Means dengan data mahasiswa baru tanpa retrain penuh")
+    parser.add_argument('input', help=f"CSV atau tabel .npz dengan kolom: {', '.join(INPUT_COLUMNS)}")
+    parser.add_argument('--drift-threshold', type=float, default=DRIFT_THRESHOLD,
+                        help="Pergeseran centroid maksimum (satuan std) sebelum retrain disarankan")
+    parser.add_argument('--inertia-threshold', type=float, default=INERTIA_THRESHOLD,
+                        help="Rasio inertia per baris (data baru / training) sebelum retrain disarankan")
+    parser.add_argument('--dry-run', action='store_true', help="Hanya hitung drift, jangan simpan artifact")
+    args = parser.parse_args()
+
+    if args.input.endswith('.npz'):
+        new_data = load_table(args.input, INPUT_COLUMNS)
+    else:
+        new_data = pd.read_csv(args.input, usecols=INPUT_COLUMNS)
+    report = update_model(new_data, args.drift_threshold, args.inertia_threshold, args.dry_run)
+    print_report(report, args.dry_run)
+
+if __name__ == "__main__":
+    main()